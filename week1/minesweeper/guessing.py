@@ -0,0 +1,338 @@
+import math
+import random
+import time
+
+# Seconds allowed for exact enumeration of one component before sampling
+TIME_LIMIT = 0.5
+
+# Number of configurations drawn when a component is sampled instead
+SAMPLES = 2000
+
+
+class EnumerationTimeout(Exception):
+    pass
+
+
+def mine_probabilities(knowledge, cells, mines_left=None,
+                       time_limit=TIME_LIMIT, cache=None):
+    """
+    Return a dictionary mapping each cell in `cells` to the probability
+    that it is a mine, given the sentences in `knowledge`.
+
+    The frontier (cells mentioned by some sentence) is split into
+    independent components, each component's consistent mine
+    configurations are counted, and the counts are weighted by the number
+    of ways the `mines_left` remaining mines can be spread over the cells
+    no sentence mentions. If `mines_left` is None, components are treated
+    as independent of the global mine count.
+    """
+    cells = set(cells)
+    constraints = set()
+    for sentence in knowledge:
+        sentence_cells = frozenset(sentence.cells & cells)
+        if sentence_cells and 0 <= sentence.count <= len(sentence_cells):
+            constraints.add((sentence_cells, sentence.count))
+
+    # Count configurations for each independent component
+    frontier = set()
+    results = []
+    for component in components(constraints):
+        key = frozenset(component)
+        if cache is not None and key in cache:
+            result = cache[key]
+        else:
+            try:
+                result = enumerate_component(
+                    component, time.monotonic() + time_limit
+                )
+            except (EnumerationTimeout, RecursionError):
+                result = sample_component(
+                    component, SAMPLES, time.monotonic() + time_limit
+                )
+            if cache is not None:
+                cache[key] = result
+
+        # Components that could not even be sampled count as unconstrained
+        if result is None:
+            continue
+        for component_cells, _ in component:
+            frontier.update(component_cells)
+        results.append(result)
+    interior = cells - frontier
+
+    # Scale each component's counts so that the largest is 1
+    scaled = []
+    for totals, mine_counts in results:
+        largest = max(totals.values())
+        scaled.append((
+            {k: n / largest for k, n in totals.items()},
+            {
+                k: {cell: n / largest for cell, n in counts.items()}
+                for k, counts in mine_counts.items()
+            }
+        ))
+
+    weight = interior_weights(len(interior), mines_left)
+
+    # Distribution of frontier mines over the other components, for each
+    # component in turn, built from prefix and suffix products
+    prefix = [{0: 1.0}]
+    for totals, _ in scaled:
+        prefix.append(convolve(prefix[-1], totals))
+    suffix = [{0: 1.0}]
+    for totals, _ in reversed(scaled):
+        suffix.append(convolve(suffix[-1], totals))
+    suffix.reverse()
+
+    everything = prefix[-1]
+    normalizer = sum(n * weight(t) for t, n in everything.items())
+    if normalizer == 0:
+        return {cell: None for cell in cells}
+
+    probabilities = dict()
+    for index, (totals, mine_counts) in enumerate(scaled):
+        others = convolve(prefix[index], suffix[index + 1])
+        for k, counts in mine_counts.items():
+            w = sum(n * weight(k + s) for s, n in others.items())
+            for cell, n in counts.items():
+                probabilities[cell] = (
+                    probabilities.get(cell, 0) + n * w / normalizer
+                )
+
+    # Frontier cells that are never a mine were left out of the counts
+    for cell in frontier:
+        probabilities.setdefault(cell, 0.0)
+
+    # Every cell outside the frontier is equally likely to be a mine
+    if interior:
+        if mines_left is None:
+            frontier_probabilities = [
+                probabilities[cell] for cell in frontier
+            ]
+            p = (
+                sum(frontier_probabilities) / len(frontier_probabilities)
+                if frontier_probabilities else 0.5
+            )
+        else:
+            expected = sum(
+                n * weight(t) * (mines_left - t)
+                for t, n in everything.items()
+            ) / normalizer
+            p = expected / len(interior)
+        for cell in interior:
+            probabilities[cell] = p
+    return probabilities
+
+
+def interior_weights(size, mines_left):
+    """
+    Return a function giving the relative number of ways to place the
+    mines not used by the frontier among `size` unconstrained cells,
+    given how many mines the frontier uses.
+    """
+    if mines_left is None:
+        return lambda t: 1.0
+
+    def log_ways(r):
+        return (math.lgamma(size + 1) - math.lgamma(r + 1)
+                - math.lgamma(size - r + 1))
+
+    largest = max(
+        log_ways(r) for r in range(0, min(size, mines_left) + 1)
+    )
+
+    def weight(t):
+        r = mines_left - t
+        if r < 0 or r > size:
+            return 0.0
+        return math.exp(log_ways(r) - largest)
+
+    return weight
+
+
+def convolve(a, b):
+    """
+    Convolve two distributions over numbers of mines, each given as a
+    dictionary mapping a number of mines to a weight.
+    """
+    result = dict()
+    for i, x in a.items():
+        for j, y in b.items():
+            result[i + j] = result.get(i + j, 0) + x * y
+    return result
+
+
+def components(constraints):
+    """
+    Split a set of (cells, count) constraints into groups
+    that share no cells with one another.
+    """
+    parent = dict()
+
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    for cells, _ in constraints:
+        for cell in cells:
+            parent.setdefault(cell, cell)
+        first = find(next(iter(cells)))
+        for cell in cells:
+            root = find(cell)
+            if root != first:
+                parent[root] = first
+
+    groups = dict()
+    for constraint in constraints:
+        root = find(next(iter(constraint[0])))
+        groups.setdefault(root, []).append(constraint)
+    return list(groups.values())
+
+
+def order_cells(constraints):
+    """
+    Return the cells of a component in breadth-first order over
+    constraints, so that constraints are completed early in the search.
+    """
+    by_cell = dict()
+    for index, (cells, _) in enumerate(constraints):
+        for cell in cells:
+            by_cell.setdefault(cell, []).append(index)
+
+    order = []
+    seen_cells = set()
+    seen_constraints = {0}
+    queue = [0]
+    while queue:
+        index = queue.pop(0)
+        for cell in sorted(constraints[index][0]):
+            if cell in seen_cells:
+                continue
+            seen_cells.add(cell)
+            order.append(cell)
+            for other in by_cell[cell]:
+                if other not in seen_constraints:
+                    seen_constraints.add(other)
+                    queue.append(other)
+    return order, by_cell
+
+
+def enumerate_component(constraints, deadline):
+    """
+    Count every mine configuration consistent with a component's
+    constraints by backtracking.
+
+    Return a pair (totals, mine_counts): `totals` maps a number of mines
+    to how many configurations use that many, and `mine_counts` maps a
+    number of mines to how often each cell is a mine among those
+    configurations. Raise EnumerationTimeout once `deadline` passes.
+    """
+    constraints = list(constraints)
+    order, by_cell = order_cells(constraints)
+    needed = [count for _, count in constraints]
+    unassigned = [len(cells) for cells, _ in constraints]
+    assigned = []
+    totals = dict()
+    mine_counts = dict()
+    nodes = 0
+
+    def search(position, mines):
+        nonlocal nodes
+        nodes += 1
+        if nodes % 1024 == 0 and time.monotonic() > deadline:
+            raise EnumerationTimeout
+
+        if position == len(order):
+            totals[mines] = totals.get(mines, 0) + 1
+            counts = mine_counts.setdefault(mines, dict())
+            for cell in assigned:
+                counts[cell] = counts.get(cell, 0) + 1
+            return
+
+        cell = order[position]
+        indices = by_cell[cell]
+        for index in indices:
+            unassigned[index] -= 1
+
+        # Try the cell as safe, then as a mine
+        if all(needed[i] <= unassigned[i] for i in indices):
+            search(position + 1, mines)
+        if all(needed[i] > 0 for i in indices):
+            for i in indices:
+                needed[i] -= 1
+            assigned.append(cell)
+            search(position + 1, mines + 1)
+            assigned.pop()
+            for i in indices:
+                needed[i] += 1
+
+        for index in indices:
+            unassigned[index] += 1
+
+    search(0, 0)
+    return totals, mine_counts
+
+
+def sample_component(constraints, samples, deadline, rng=random):
+    """
+    Estimate the result of `enumerate_component` for a component that
+    is too large to enumerate, by drawing up to `samples` consistent
+    configurations with randomized backtracking before `deadline`.
+    Return None if no configuration could be found.
+    """
+    constraints = list(constraints)
+    order, by_cell = order_cells(constraints)
+    totals = dict()
+    mine_counts = dict()
+
+    for _ in range(samples):
+        needed = [count for _, count in constraints]
+        unassigned = [len(cells) for cells, _ in constraints]
+        mines = []
+
+        def search(position):
+            if position == len(order):
+                return True
+            cell = order[position]
+            indices = by_cell[cell]
+            for index in indices:
+                unassigned[index] -= 1
+            values = [False, True]
+            rng.shuffle(values)
+            for mine in values:
+                if mine:
+                    if not all(needed[i] > 0 for i in indices):
+                        continue
+                    for i in indices:
+                        needed[i] -= 1
+                    mines.append(cell)
+                    if search(position + 1):
+                        return True
+                    mines.pop()
+                    for i in indices:
+                        needed[i] += 1
+                elif all(needed[i] <= unassigned[i] for i in indices):
+                    if search(position + 1):
+                        return True
+            for index in indices:
+                unassigned[index] += 1
+            return False
+
+        try:
+            if not search(0):
+                break
+        except RecursionError:
+            break
+        k = len(mines)
+        totals[k] = totals.get(k, 0) + 1
+        counts = mine_counts.setdefault(k, dict())
+        for cell in mines:
+            counts[cell] = counts.get(cell, 0) + 1
+        if time.monotonic() > deadline:
+            break
+
+    if not totals:
+        return None
+    return totals, mine_counts
@@ -1,6 +1,12 @@
 import itertools
 import random
 
+from collections import deque
+
+import numpy as np
+
+from guessing import mine_probabilities
+
 
 class Minesweeper():
     """
@@ -12,23 +18,26 @@ class Minesweeper():
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
 
         # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
-
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        self.board = np.zeros((height, width), dtype=bool)
+
+        # Add mines randomly, sampling cells without replacement
+        cells = np.array(random.sample(range(height * width), mines),
+                         dtype=np.int64)
+        self.board.flat[cells] = True
+        rows, columns = np.divmod(cells, width)
+        self.mines = set(zip(rows.tolist(), columns.tolist()))
+
+        # Count the mines around every cell at once by summing the eight
+        # shifted copies of the board, padded with a border of no mines
+        padded = np.pad(self.board, 1).astype(np.uint8)
+        self.counts = np.zeros((height, width), dtype=np.uint8)
+        for di in range(3):
+            for dj in range(3):
+                if di == 1 and dj == 1:
+                    continue
+                self.counts += padded[di:di + height, dj:dj + width]
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -50,7 +59,7 @@ class Minesweeper():
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return bool(self.board[i, j])
 
     def nearby_mines(self, cell):
         """
@@ -58,24 +67,31 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
+        i, j = cell
+        return int(self.counts[i, j])
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
+    def reveal(self, cell, revealed=()):
+        """
+        Reveals a safe cell, and, if no mines are near it, keeps revealing
+        the neighbors of every such cell, as a player's click would.
+        Cells in `revealed` are neither revealed again nor expanded.
 
-        return count
+        Returns a dictionary mapping each newly revealed cell
+        to its number of nearby mines.
+        """
+        cells = {cell: self.nearby_mines(cell)}
+        queue = deque([cell])
+        while queue:
+            i, j = queue.popleft()
+            if cells[i, j] != 0:
+                continue
+            for k in range(max(i - 1, 0), min(i + 2, self.height)):
+                for l in range(max(j - 1, 0), min(j + 2, self.width)):
+                    if (k, l) in cells or (k, l) in revealed:
+                        continue
+                    cells[k, l] = int(self.counts[k, l])
+                    queue.append((k, l))
+        return cells
 
     def won(self):
         """
@@ -155,12 +171,20 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None, guessing="random"):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Total number of mines on the board, if known, and how to pick a
+        # move when no safe move is known: "random" or "probability"
+        self.total_mines = mines
+        self.guessing = guessing
+
+        # Configuration counts for frontier components, reused across guesses
+        self.guess_cache = dict()
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -171,12 +195,44 @@ class MinesweeperAI():
         # List of sentences about the game known to be true
         self.knowledge = []
 
+        # Precompute the neighbors of every cell on the board
+        self.neighbors = dict()
+        for i in range(self.height):
+            for j in range(self.width):
+                self.neighbors[i, j] = [
+                    (k, l)
+                    for k in range(max(i - 1, 0), min(i + 2, self.height))
+                    for l in range(max(j - 1, 0), min(j + 2, self.width))
+                    if (k, l) != (i, j)
+                ]
+
+        # Cells that are neither moves made nor known mines, kept as a
+        # list plus an index so cells can be removed and chosen in O(1)
+        self.available = list(self.neighbors)
+        self.available_index = {
+            cell: index for index, cell in enumerate(self.available)
+        }
+
+    def remove_available(self, cell):
+        """
+        Removes a cell from the cells available for a random move
+        by swapping it with the last available cell.
+        """
+        index = self.available_index.pop(cell, None)
+        if index is None:
+            return
+        last = self.available.pop()
+        if index < len(self.available):
+            self.available[index] = last
+            self.available_index[last] = index
+
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
+        self.remove_available(cell)
         for sentence in self.knowledge:
             sentence.mark_mine(cell)
 
@@ -205,38 +261,11 @@ class MinesweeperAI():
                if they can be inferred from existing knowledge
         """
         self.moves_made.add(cell)
+        self.remove_available(cell)
         self.mark_safe(cell)
-        
-        
-        row, column = cell
-        neighbors = set()
-        if row-1 >= 0:
-            up = (row-1,column)
-            neighbors.add(up)
-            if column - 1 >= 0:
-                up_left = (row-1,column-1)
-                neighbors.add(up_left)
-            if column+1 <= 7:
-                up_right = (row-1,column+1)           
-                neighbors.add(up_right)
-        if row+1 <= 7:
-            down = (row+1,column)              #checking all neighboring cells
-            neighbors.add(down)
-            if column - 1 >= 0:
-                down_left = (row+1,column-1)
-                neighbors.add(down_left)
-            if column+1 <= 7:
-                down_right = (row+1,column+1)
-                neighbors.add(down_right)
-        if column-1 >= 0:
-            left = (row,column-1)
-            neighbors.add(left)
-        if column +1 <= 7:
-            right = (row,column+1)
-            neighbors.add(right)
-        
+
         undetermined_neighbors = set()    
-        for c in neighbors:
+        for c in self.neighbors[cell]:
             if c in self.safes:    #removes determined cells
                 continue
             elif c in self.mines:
@@ -305,18 +334,37 @@ class MinesweeperAI():
             1) have not already been chosen, and
             2) are not known to be mines
         """
-        available_moves = set()
-        for i in range(8):
-            for j in range(8):
-                cell = (i,j)
-                if cell not in self.mines:
-                    if cell not in self.moves_made:
-                        available_moves.add(cell)
-                        
-        if available_moves:
-            move = random.choice(list(available_moves))
-            return move
-        
-        return None
-                    
+        if not self.available:
+            return None
+        if self.guessing == "probability":
+            return self.make_probable_move()
+        return random.choice(self.available)
+
         raise NotImplementedError
+
+    def make_probable_move(self):
+        """
+        Returns the available cell least likely to be a mine, given the
+        AI's knowledge base and, if known, the total number of mines.
+        Falls back to a uniformly random cell if the knowledge base
+        admits no consistent configuration.
+        """
+        mines_left = None
+        if self.total_mines is not None:
+            mines_left = self.total_mines - len(self.mines)
+        if len(self.guess_cache) > 10000:
+            self.guess_cache.clear()
+
+        probabilities = mine_probabilities(
+            self.knowledge, self.available, mines_left,
+            cache=self.guess_cache
+        )
+        if any(p is None for p in probabilities.values()):
+            return random.choice(self.available)
+
+        lowest = min(probabilities.values())
+        candidates = [
+            cell for cell, p in probabilities.items()
+            if p <= lowest + 1e-12
+        ]
+        return random.choice(candidates)
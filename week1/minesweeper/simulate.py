@@ -0,0 +1,207 @@
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+# Move numbers at which the knowledge base size is reported
+CHECKPOINTS = [1, 5, 10, 25, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play Minesweeper games headlessly with MinesweeperAI."
+    )
+    parser.add_argument("-n", "--games", type=int, default=100,
+                        help="games to play per configuration")
+    parser.add_argument("-s", "--size", action="append", type=parse_size,
+                        help="board size as HEIGHTxWIDTH (repeatable)")
+    parser.add_argument("-d", "--density", action="append", type=float,
+                        help="fraction of cells that are mines (repeatable)")
+    parser.add_argument("-m", "--mines", action="append", type=int,
+                        help="number of mines, instead of a density")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="base seed; each game derives its own")
+    parser.add_argument("-p", "--processes", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("-g", "--guessing", default="random",
+                        choices=["random", "probability"],
+                        help="how the AI guesses when no move is safe")
+    parser.add_argument("--json", metavar="FILE",
+                        help="also write the results as JSON to FILE")
+    args = parser.parse_args()
+
+    sizes = args.size or [(8, 8)]
+    if args.mines and args.density:
+        sys.exit("Use either --mines or --density, not both.")
+    configurations = []
+    for height, width in sizes:
+        if args.mines:
+            counts = args.mines
+        else:
+            counts = [
+                max(1, round(density * height * width))
+                for density in args.density or [8 / 64]
+            ]
+        for mines in counts:
+            if not 0 < mines < height * width:
+                sys.exit(f"Cannot place {mines} mines on {height}x{width}.")
+            configurations.append((height, width, mines))
+
+    results = []
+    with ProcessPoolExecutor(max_workers=args.processes) as executor:
+        for height, width, mines in configurations:
+            games = [
+                (height, width, mines, args.guessing,
+                 f"{args.seed}-{height}x{width}-{mines}-{game}")
+                for game in range(args.games)
+            ]
+            start = time.perf_counter()
+            played = list(executor.map(play, games, chunksize=4))
+            elapsed = time.perf_counter() - start
+            result = summarize(height, width, mines, played, elapsed)
+            report(result)
+            results.append(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def parse_size(text):
+    """
+    Parse a board size of the form HEIGHTxWIDTH.
+    """
+    try:
+        height, width = (int(n) for n in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {text}")
+    return height, width
+
+
+def play(game):
+    """
+    Play one game to completion and return statistics about it.
+    The game is a tuple (height, width, mines, guessing, seed).
+    """
+    height, width, mines, guessing, seed = game
+    random.seed(seed)
+    board = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines,
+                       guessing=guessing)
+
+    safe_cells = height * width - mines
+    inference_times = []
+    knowledge_sizes = []
+    won = False
+    start = time.perf_counter()
+
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+        if move is None or board.is_mine(move):
+            break
+
+        # Reveal the whole region around cells with no nearby mines
+        for cell, nearby in board.reveal(move, ai.moves_made).items():
+            before = time.perf_counter()
+            ai.add_knowledge(cell, nearby)
+            inference_times.append(time.perf_counter() - before)
+            knowledge_sizes.append(len(ai.knowledge))
+
+        if len(ai.moves_made) == safe_cells:
+            won = True
+            break
+
+    return {
+        "won": won,
+        "moves": len(inference_times),
+        "time": time.perf_counter() - start,
+        "inference_times": inference_times,
+        "knowledge_sizes": knowledge_sizes
+    }
+
+
+def summarize(height, width, mines, played, elapsed):
+    """
+    Combine the statistics of the games played on one configuration.
+    """
+    moves = sum(game["moves"] for game in played)
+    game_time = sum(game["time"] for game in played)
+    inference_times = sorted(
+        t for game in played for t in game["inference_times"]
+    )
+
+    # Average knowledge base size at each checkpoint, over the games
+    # that lasted at least that many moves
+    knowledge = dict()
+    for checkpoint in CHECKPOINTS:
+        sizes = [
+            game["knowledge_sizes"][checkpoint - 1] for game in played
+            if len(game["knowledge_sizes"]) >= checkpoint
+        ]
+        if sizes:
+            knowledge[checkpoint] = statistics.mean(sizes)
+
+    return {
+        "height": height,
+        "width": width,
+        "mines": mines,
+        "games": len(played),
+        "win_rate": sum(game["won"] for game in played) / len(played),
+        "moves": moves,
+        "elapsed": elapsed,
+        "moves_per_second": moves / game_time if game_time else 0,
+        "inference": {
+            "calls": len(inference_times),
+            "mean": (statistics.mean(inference_times)
+                     if inference_times else 0),
+            "median": percentile(inference_times, 0.5),
+            "p95": percentile(inference_times, 0.95),
+            "max": inference_times[-1] if inference_times else 0
+        },
+        "knowledge": knowledge,
+        "knowledge_peak": max(
+            (max(game["knowledge_sizes"], default=0) for game in played),
+            default=0
+        )
+    }
+
+
+def percentile(values, fraction):
+    """
+    Return the given percentile of a sorted list of values.
+    """
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def report(result):
+    """
+    Print the summary of one configuration.
+    """
+    inference = result["inference"]
+    print(f"{result['height']}x{result['width']}, "
+          f"{result['mines']} mines, {result['games']} games "
+          f"in {result['elapsed']:.2f}s")
+    print(f"  Win rate: {result['win_rate']:.2%}")
+    print(f"  Moves per second: {result['moves_per_second']:.1f}")
+    print(f"  add_knowledge: {inference['calls']} calls, "
+          f"mean {inference['mean'] * 1000:.3f}ms, "
+          f"median {inference['median'] * 1000:.3f}ms, "
+          f"p95 {inference['p95'] * 1000:.3f}ms, "
+          f"max {inference['max'] * 1000:.3f}ms")
+    print(f"  Knowledge base size (peak {result['knowledge_peak']}):")
+    for checkpoint, size in result["knowledge"].items():
+        print(f"    after move {checkpoint}: {size:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import itertools
+import random
+
+import pytest
+
+from guessing import mine_probabilities
+from minesweeper import Sentence
+
+# Random knowledge bases checked for each case
+TRIALS = 300
+
+
+def random_knowledge(rng, height=4, width=4, mines=4):
+    """
+    Place `mines` mines on a board, reveal a few safe cells, and return
+    the sentences they give, the cells still unknown and the number of
+    mines among those cells.
+    """
+    board = [(i, j) for i in range(height) for j in range(width)]
+    placed = set(rng.sample(board, mines))
+    safe = [cell for cell in board if cell not in placed]
+    revealed = set(rng.sample(safe, rng.randint(1, 6)))
+
+    knowledge = []
+    for i, j in revealed:
+        neighbors = set(
+            (i + di, j + dj) for di in (-1, 0, 1) for dj in (-1, 0, 1)
+            if (i + di, j + dj) in board
+        ) - revealed
+        if neighbors:
+            knowledge.append(Sentence(neighbors, len(neighbors & placed)))
+    cells = [cell for cell in board if cell not in revealed]
+    return knowledge, cells, mines
+
+
+def brute_force(knowledge, cells, mines_left):
+    """
+    Return the probability that each cell is a mine, counting every
+    consistent placement of `mines_left` mines over `cells` equally, or,
+    if `mines_left` is None, every consistent placement of mines over the
+    cells some sentence mentions, with the other cells at the average of
+    those probabilities.
+    """
+    if mines_left is None:
+        frontier = sorted(set().union(
+            *(sentence.cells for sentence in knowledge)
+        ))
+        placements = itertools.chain.from_iterable(
+            itertools.combinations(frontier, k)
+            for k in range(len(frontier) + 1)
+        )
+    else:
+        frontier = cells
+        placements = itertools.combinations(cells, mines_left)
+
+    counts = dict.fromkeys(cells, 0)
+    total = 0
+    for placement in placements:
+        placement = set(placement)
+        if all(len(sentence.cells & placement) == sentence.count
+               for sentence in knowledge):
+            total += 1
+            for cell in placement:
+                counts[cell] += 1
+
+    probabilities = {cell: counts[cell] / total for cell in frontier}
+    interior = [cell for cell in cells if cell not in probabilities]
+    if interior:
+        p = (
+            sum(probabilities.values()) / len(probabilities)
+            if probabilities else 0.5
+        )
+        for cell in interior:
+            probabilities[cell] = p
+    return probabilities
+
+
+@pytest.mark.parametrize("known_mines", [True, False])
+def test_mine_probabilities_match_brute_force(known_mines):
+    """
+    Compare the probabilities of random knowledge bases, with and
+    without the number of mines left, to a brute-force count.
+    """
+    rng = random.Random(0)
+    for _ in range(TRIALS):
+        knowledge, cells, mines = random_knowledge(rng)
+        mines_left = mines if known_mines else None
+        expected = brute_force(knowledge, cells, mines_left)
+        got = mine_probabilities(knowledge, cells, mines_left)
+        assert got.keys() == expected.keys()
+        for cell in cells:
+            assert got[cell] == pytest.approx(expected[cell]), cell
@@ -0,0 +1,166 @@
+import argparse
+import csv
+import json
+import os
+import sys
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from heredity import GENES, METHODS, SAMPLING_METHODS, infer, load_person
+
+# Methods that can run inside a worker process
+BATCH_METHODS = [
+    method for method in METHODS if method not in SAMPLING_METHODS
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Infer gene and trait probabilities for many families."
+    )
+    parser.add_argument("input",
+                        help="directory of family CSV files, or one CSV "
+                             "file with a family id column")
+    parser.add_argument("-o", "--output",
+                        help="file to write results to (default: stdout)")
+    parser.add_argument("-f", "--format", choices=["jsonl", "csv"],
+                        default="jsonl", help="output format")
+    parser.add_argument("-m", "--method", choices=BATCH_METHODS,
+                        default="elimination",
+                        help="inference method (default: elimination)")
+    parser.add_argument("-c", "--column", default="family",
+                        help="name of the family id column (default: family)")
+    parser.add_argument("-p", "--processes", type=int,
+                        help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    try:
+        families = load_families(args.input, args.column)
+    except (KeyError, ValueError) as e:
+        sys.exit(f"Invalid input: {e}")
+
+    # Largest components first, so no large one is left until the end
+    tasks = [
+        (family, component, args.method)
+        for family, people in families.items()
+        for component in components(people)
+    ]
+    tasks.sort(key=lambda task: len(task[1]), reverse=True)
+
+    f = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        write = writer(f, args.format)
+        with ProcessPoolExecutor(max_workers=args.processes) as executor:
+            futures = [executor.submit(solve, task) for task in tasks]
+            for future in as_completed(futures):
+                family, probabilities = future.result()
+                for person, distributions in probabilities.items():
+                    write(family, person, distributions)
+    finally:
+        if f is not sys.stdout:
+            f.close()
+
+
+def load_families(path, column="family"):
+    """
+    Load families from a directory of CSV files, one family per file and
+    named after the file, or from one CSV file where `column` gives each
+    person's family. A CSV file without that column is a single family.
+
+    Return a dictionary mapping each family id to its people, in the
+    format of `load_data`.
+    """
+    if os.path.isdir(path):
+        filenames = sorted(
+            os.path.join(path, filename) for filename in os.listdir(path)
+            if filename.endswith(".csv")
+        )
+    else:
+        filenames = [path]
+
+    families = dict()
+    for filename in filenames:
+        stem = os.path.splitext(os.path.basename(filename))[0]
+        with open(filename) as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                family = row[column] if column in row else stem
+                people = families.setdefault(family, dict())
+                people[row["name"]] = load_person(row)
+
+    for family, people in families.items():
+        for person in people.values():
+            for parent in (person["mother"], person["father"]):
+                if parent is not None and parent not in people:
+                    raise ValueError(
+                        f"{person['name']}'s parent {parent} "
+                        f"is not in family {family}"
+                    )
+    return families
+
+
+def components(people):
+    """
+    Split a family into groups of people connected by parent links,
+    whose probabilities do not depend on one another.
+    """
+    parent = {person: person for person in people}
+
+    def find(person):
+        while parent[person] != person:
+            parent[person] = parent[parent[person]]
+            person = parent[person]
+        return person
+
+    for person in people:
+        for relative in (people[person]["mother"], people[person]["father"]):
+            if relative is not None:
+                parent[find(relative)] = find(person)
+
+    groups = dict()
+    for person in people:
+        groups.setdefault(find(person), dict())[person] = people[person]
+    return list(groups.values())
+
+
+def solve(task):
+    """
+    Run inference on one connected component of a family.
+    """
+    family, people, method = task
+    return family, infer(people, method)
+
+
+def writer(f, format):
+    """
+    Return a function that writes one person's probabilities to `f`
+    as a JSON line or a CSV row.
+    """
+    if format == "jsonl":
+        def write(family, person, distributions):
+            f.write(json.dumps({
+                "family": family,
+                "name": person,
+                "gene": {
+                    str(genes): float(distributions["gene"][genes])
+                    for genes in GENES
+                },
+                "trait": float(distributions["trait"][True])
+            }) + "\n")
+        return write
+
+    rows = csv.writer(f)
+    rows.writerow(["family", "name"] +
+                  [f"gene{genes}" for genes in GENES] + ["trait"])
+
+    def write(family, person, distributions):
+        rows.writerow(
+            [family, person] +
+            [f"{distributions['gene'][genes]:.6f}" for genes in GENES] +
+            [f"{distributions['trait'][True]:.6f}"]
+        )
+    return write
+
+
+if __name__ == "__main__":
+    main()
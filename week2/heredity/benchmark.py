@@ -0,0 +1,119 @@
+import argparse
+import glob
+import os
+import random
+import time
+
+from heredity import METHODS, SAMPLING_METHODS, infer, load_data
+
+# Largest family each method is run on, since some grow exponentially
+LIMITS = {
+    "enumeration": 10,
+    "vectorized": 13
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time heredity inference methods on sample families "
+                    "and on larger synthetic families."
+    )
+    parser.add_argument("-m", "--method", action="append", choices=METHODS,
+                        help="method to time (repeatable, default: all "
+                             "exact methods)")
+    parser.add_argument("-s", "--size", action="append", type=int,
+                        help="synthetic family size (repeatable)")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="runs per measurement; the best is reported")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed for generating synthetic families")
+    parser.add_argument("--data", default=os.path.join(
+                            os.path.dirname(os.path.abspath(__file__)),
+                            "data"),
+                        help="directory of family CSV files")
+    args = parser.parse_args()
+
+    methods = args.method or [
+        method for method in METHODS if method not in SAMPLING_METHODS
+    ]
+    families = [
+        (os.path.basename(filename), load_data(filename))
+        for filename in sorted(glob.glob(os.path.join(args.data, "*.csv")))
+    ]
+    for size in args.size or [6, 8, 10, 12, 16, 64, 256]:
+        families.append((
+            f"synthetic-{size}", synthetic_family(size, seed=args.seed)
+        ))
+
+    print(f"{'family':<16}{'people':>8}" +
+          "".join(f"{method:>14}" for method in methods))
+    for name, people in families:
+        row = f"{name:<16}{len(people):>8}"
+        for method in methods:
+            if len(people) > LIMITS.get(method, len(people)):
+                row += f"{'-':>14}"
+                continue
+            seconds = best_time(people, method, args.repeat)
+            row += f"{seconds * 1000:>12.2f}ms"
+        print(row)
+
+
+def best_time(people, method, repeat):
+    """
+    Return the shortest of `repeat` timings of inference on `people`.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        infer(people, method)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def synthetic_family(size, seed=0, observed=0.5):
+    """
+    Return a tree-shaped family of `size` people in the format of
+    `load_data`. Starting from one couple, each couple has one to three
+    children, most of whom have children with a new partner from outside
+    the family. Each person's trait is known with probability `observed`.
+    """
+    rng = random.Random(seed)
+    people = dict()
+
+    def add(mother=None, father=None):
+        name = f"Person{len(people)}"
+        trait = None
+        if rng.random() < observed:
+            trait = rng.random() < 0.1
+        people[name] = {
+            "name": name,
+            "mother": mother,
+            "father": father,
+            "trait": trait
+        }
+        return name
+
+    couples = [(add(), add())] if size > 1 else []
+    if size == 1:
+        add()
+    while len(people) < size:
+        mother, father = couples.pop(0)
+        for _ in range(rng.randint(1, 3)):
+            if len(people) == size:
+                break
+            child = add(mother, father)
+            if len(people) < size and rng.random() < 0.7:
+                partner = add()
+                if rng.random() < 0.5:
+                    couples.append((child, partner))
+                else:
+                    couples.append((partner, child))
+        if not couples and len(people) < size:
+            couples.append((child, add()))
+    return people
+
+
+if __name__ == "__main__":
+    main()
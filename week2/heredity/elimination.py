@@ -0,0 +1,254 @@
+import heapq
+import itertools
+
+from heredity import (
+    GENES, PROBS, conditional_probability, empty_probabilities
+)
+
+
+class Factor():
+    """
+    Table of non-negative values over every assignment of gene counts
+    to an ordered tuple of people.
+    """
+
+    def __init__(self, variables, values):
+        self.variables = tuple(variables)
+        self.values = values
+
+    def __repr__(self):
+        return f"Factor({self.variables})"
+
+    def sum_out(self, variables):
+        """
+        Return a new factor with `variables` summed out of this one.
+        """
+        keep = [
+            index for index, variable in enumerate(self.variables)
+            if variable not in variables
+        ]
+        values = dict()
+        for assignment, value in self.values.items():
+            key = tuple(assignment[index] for index in keep)
+            values[key] = values.get(key, 0) + value
+        return Factor((self.variables[index] for index in keep), values)
+
+    def normalized(self):
+        """
+        Return this factor scaled so that its values sum to 1, which
+        keeps long chains of messages from underflowing.
+        """
+        total = sum(self.values.values())
+        if total == 0:
+            return self
+        return Factor(self.variables, {
+            assignment: value / total
+            for assignment, value in self.values.items()
+        })
+
+
+def multiply(factors, variables=None):
+    """
+    Return the product of `factors` as a factor over `variables`,
+    which defaults to the union of the factors' variables.
+    """
+    if variables is None:
+        variables = []
+        for factor in factors:
+            for variable in factor.variables:
+                if variable not in variables:
+                    variables.append(variable)
+    variables = tuple(variables)
+    positions = {variable: index for index, variable in enumerate(variables)}
+    lookups = [
+        (factor.values, [positions[v] for v in factor.variables])
+        for factor in factors
+    ]
+
+    values = dict()
+    for assignment in itertools.product(GENES, repeat=len(variables)):
+        value = 1
+        for table, indices in lookups:
+            value *= table[tuple(assignment[index] for index in indices)]
+            if value == 0:
+                break
+        values[assignment] = value
+    return Factor(variables, values)
+
+
+def person_factor(people, person):
+    """
+    Return the factor for one person's gene count, conditioned on their
+    parents' gene counts if known, times the likelihood of their trait.
+    """
+    trait = people[person]["trait"]
+    mother = people[person]["mother"]
+    father = people[person]["father"]
+
+    if mother is None:
+        return Factor((person,), {
+            (genes,): conditional_probability(genes, None, None, trait)
+            for genes in GENES
+        })
+
+    return Factor((person, mother, father), {
+        (genes, mother_genes, father_genes): conditional_probability(
+            genes, mother_genes, father_genes, trait
+        )
+        for genes, mother_genes, father_genes in itertools.product(
+            GENES, repeat=3
+        )
+    })
+
+
+def elimination_order(factors):
+    """
+    Return an order in which to eliminate every variable, greedily
+    choosing the variable whose elimination adds the fewest new edges
+    to the interaction graph, breaking ties by fewest neighbors.
+    """
+    graph = dict()
+    for factor in factors:
+        for variable in factor.variables:
+            graph.setdefault(variable, set()).update(
+                v for v in factor.variables if v != variable
+            )
+
+    def score(variable):
+        neighbors = list(graph[variable])
+        fill = sum(
+            1 for a, b in itertools.combinations(neighbors, 2)
+            if b not in graph[a]
+        )
+        return fill, len(neighbors)
+
+    # Heap of candidates; entries whose score is stale are skipped
+    scores = {variable: score(variable) for variable in graph}
+    heap = [(scores[v], index, v) for index, v in enumerate(graph)]
+    heapq.heapify(heap)
+    counter = len(heap)
+
+    order = []
+    while heap:
+        key, _, variable = heapq.heappop(heap)
+        if variable not in graph or scores[variable] != key:
+            continue
+        neighbors = graph.pop(variable)
+        for neighbor in neighbors:
+            graph[neighbor].discard(variable)
+            graph[neighbor].update(n for n in neighbors if n != neighbor)
+        order.append(variable)
+
+        # Only the scores of nearby variables can have changed
+        affected = set(neighbors)
+        for neighbor in neighbors:
+            affected.update(graph[neighbor])
+        for v in affected:
+            scores[v] = score(v)
+            heapq.heappush(heap, (scores[v], counter, v))
+            counter += 1
+    return order
+
+
+def eliminate_probabilities(people):
+    """
+    Compute the exact gene and trait probabilities of every person by
+    treating the family as a Bayesian network over gene counts.
+
+    Variable elimination along a min-fill order builds a junction tree
+    of cliques; one pass up the tree and one pass back down then gives
+    the marginal of every person at once. For tree-shaped pedigrees
+    every clique holds at most a child and their two parents, so the
+    total work grows linearly with the size of the family.
+    """
+    factors = [person_factor(people, person) for person in people]
+    order = elimination_order(factors)
+
+    # Build one clique per eliminated variable. Each clique keeps the
+    # original factors first used there, and the cliques whose messages
+    # it absorbs become its children.
+    cliques = []
+    pending = dict()
+    by_variable = dict()
+    keys = itertools.count()
+
+    def add_pending(factor, child):
+        key = next(keys)
+        pending[key] = (factor, child)
+        for v in factor.variables:
+            by_variable.setdefault(v, []).append(key)
+
+    for factor in factors:
+        add_pending(factor, None)
+
+    for variable in order:
+        involved = [
+            pending.pop(key) for key in by_variable.pop(variable)
+            if key in pending
+        ]
+        variables = []
+        for factor, _ in involved:
+            for v in factor.variables:
+                if v not in variables:
+                    variables.append(v)
+        clique = {
+            "variable": variable,
+            "variables": variables,
+            "factors": [f for f, child in involved if child is None],
+            "children": [child for _, child in involved if child is not None],
+            "up": None,
+            "down": None
+        }
+        cliques.append(clique)
+
+        # Placeholder standing for the message this clique sends upward
+        separator = [v for v in variables if v != variable]
+        add_pending(Factor(separator, None), len(cliques) - 1)
+
+    # Upward pass, in elimination order so children come before parents
+    for clique in cliques:
+        incoming = [cliques[child]["up"] for child in clique["children"]]
+        product = multiply(clique["factors"] + incoming, clique["variables"])
+        clique["up"] = product.sum_out({clique["variable"]}).normalized()
+
+    # Downward pass, from the roots back towards the leaves
+    probabilities = empty_probabilities(people)
+    for clique in reversed(cliques):
+        incoming = [cliques[child]["up"] for child in clique["children"]]
+        if clique["down"] is not None:
+            incoming.append(clique["down"])
+
+        belief = multiply(clique["factors"] + incoming, clique["variables"])
+        marginal = belief.sum_out(
+            set(clique["variables"]) - {clique["variable"]}
+        )
+        total = sum(marginal.values.values())
+        person = clique["variable"]
+        for (genes,), p in marginal.values.items():
+            probabilities[person]["gene"][genes] = p / total
+
+        for index, child in enumerate(clique["children"]):
+            others = incoming[:index] + incoming[index + 1:]
+            product = multiply(
+                clique["factors"] + others, clique["variables"]
+            )
+            separator = cliques[child]["up"].variables
+            cliques[child]["down"] = product.sum_out(
+                set(clique["variables"]) - set(separator)
+            ).normalized()
+
+    # Trait probabilities follow from gene probabilities and evidence
+    for person in people:
+        trait = people[person]["trait"]
+        for value in (True, False):
+            if trait is not None:
+                p = 1 if value == trait else 0
+            else:
+                p = sum(
+                    probabilities[person]["gene"][genes]
+                    * PROBS["trait"][genes][value]
+                    for genes in GENES
+                )
+            probabilities[person]["trait"][value] = p
+
+    return probabilities
@@ -1,6 +1,7 @@
+import argparse
 import csv
+import functools
 import itertools
-import sys
 
 PROBS = {
 
@@ -36,16 +37,81 @@ PROBS = {
     "mutation": 0.01
 }
 
+# Possible numbers of copies of the gene
+GENES = (0, 1, 2)
+
+
+# Inference methods that can be chosen from the command line
+METHODS = ["enumeration", "elimination", "vectorized", "likelihood", "gibbs"]
+
+# Methods that estimate probabilities by sampling
+SAMPLING_METHODS = ["likelihood", "gibbs"]
+
 
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
-    people = load_data(sys.argv[1])
+    parser = argparse.ArgumentParser(
+        description="Infer gene and trait probabilities for a family."
+    )
+    parser.add_argument("data", help="CSV file of people in the family")
+    parser.add_argument("-m", "--method", choices=METHODS,
+                        default="enumeration",
+                        help="inference method (default: enumeration)")
+    parser.add_argument("-n", "--samples", type=int, default=100000,
+                        help="sample budget for sampling methods")
+    parser.add_argument("-e", "--stderr", type=float,
+                        help="stop sampling once every standard error "
+                             "is at most this")
+    parser.add_argument("-p", "--processes", type=int,
+                        help="worker processes for sampling methods")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed for sampling methods")
+    args = parser.parse_args()
+    people = load_data(args.data)
 
-    # Keep track of gene and trait probabilities for each person
-    probabilities = {
+    # Compute gene and trait probabilities for each person
+    errors = None
+    if args.method in SAMPLING_METHODS:
+        from sampling import sample_probabilities
+        probabilities, errors, stats = sample_probabilities(
+            people, args.method, samples=args.samples, stderr=args.stderr,
+            processes=args.processes, seed=args.seed, stats=True
+        )
+    else:
+        probabilities = infer(people, args.method)
+
+    # Print results
+    print_probabilities(probabilities, errors)
+    if args.method == "likelihood":
+        print(f"Effective sample size: {stats['effective_samples']:.0f} "
+              f"of {stats['samples']} samples")
+
+
+def infer(people, method="enumeration"):
+    """
+    Return gene and trait probability distributions for each person in
+    `people`, computed with the given inference method.
+    """
+    if method == "enumeration":
+        return enumerate_probabilities(people)
+    if method == "elimination":
+        from elimination import eliminate_probabilities
+        return eliminate_probabilities(people)
+    if method == "vectorized":
+        from vectorized import vectorize_probabilities
+        return vectorize_probabilities(people)
+    if method in SAMPLING_METHODS:
+        from sampling import sample_probabilities
+        return sample_probabilities(people, method)[0]
+    raise ValueError(f"unknown inference method: {method}")
+
+
+def empty_probabilities(people):
+    """
+    Return a probability table with every probability set to 0.
+    """
+    return {
         person: {
             "gene": {
                 2: 0,
@@ -60,38 +126,104 @@ def main():
         for person in people
     }
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
 
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
+def enumerate_probabilities(people):
+    """
+    Compute gene and trait probabilities by summing the joint probability
+    of every assignment of genes consistent with the evidence.
 
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
+    Known traits are fixed rather than enumerated and filtered. Unknown
+    traits are summed out of each joint probability instead of being
+    enumerated, since a person's trait given their genes sums to 1;
+    their trait probabilities are accumulated from their genes.
+    Each joint probability is a product of cached table lookups.
+    """
 
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+    # Keep track of gene and trait probabilities for each person
+    probabilities = empty_probabilities(people)
+
+    # Look up each person's parents by position in the assignment, and
+    # tabulate their probability given their own and parents' genes
+    names = list(people)
+    position = {person: index for index, person in enumerate(names)}
+    factors = []
+    for person in names:
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        trait = people[person]["trait"]
+        if mother is None:
+            factors.append((None, None, [
+                conditional_probability(genes, None, None, trait)
+                for genes in GENES
+            ]))
+        else:
+            factors.append((position[mother], position[father], [
+                [
+                    [
+                        conditional_probability(
+                            genes, mother_genes, father_genes, trait
+                        )
+                        for father_genes in GENES
+                    ]
+                    for mother_genes in GENES
+                ]
+                for genes in GENES
+            ]))
+    unknown_trait = [
+        (index, names[index]) for index in range(len(names))
+        if people[names[index]]["trait"] is None
+    ]
+
+    # Loop over every assignment of gene counts to people
+    gene_totals = [[0, 0, 0] for _ in names]
+    trait_totals = [[0, 0, 0] for _ in names]
+    for assignment in itertools.product(GENES, repeat=len(names)):
+        p = 1
+        for genes, (mother, father, table) in zip(assignment, factors):
+            if mother is None:
+                p *= table[genes]
+            else:
+                p *= table[genes][assignment[mother]][assignment[father]]
+        for index, genes in enumerate(assignment):
+            gene_totals[index][genes] += p
+        for index, _ in unknown_trait:
+            trait_totals[index][assignment[index]] += p
+
+    for index, person in enumerate(names):
+        for genes in GENES:
+            probabilities[person]["gene"][genes] = gene_totals[index][genes]
+        trait = people[person]["trait"]
+        total = sum(gene_totals[index])
+        if trait is not None:
+            probabilities[person]["trait"][trait] = total
+        else:
+            for value in (True, False):
+                probabilities[person]["trait"][value] = sum(
+                    trait_totals[index][genes] * PROBS["trait"][genes][value]
+                    for genes in GENES
+                )
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
+    return probabilities
 
-    # Print results
-    for person in people:
+
+def print_probabilities(probabilities, errors=None):
+    """
+    Print each person's gene and trait probability distributions.
+    If standard errors are given, also print 95% confidence intervals.
+    """
+    for person in probabilities:
         print(f"{person}:")
         for field in probabilities[person]:
             print(f"  {field.capitalize()}:")
             for value in probabilities[person][field]:
                 p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+                if errors is None:
+                    print(f"    {value}: {p:.4f}")
+                else:
+                    interval = 1.96 * errors[person][field][value]
+                    print(f"    {value}: {p:.4f} ± {interval:.4f}")
 
 
 def load_data(filename):
@@ -105,27 +237,33 @@ def load_data(filename):
     with open(filename) as f:
         reader = csv.DictReader(f)
         for row in reader:
-            name = row["name"]
-            data[name] = {
-                "name": name,
-                "mother": row["mother"] or None,
-                "father": row["father"] or None,
-                "trait": (True if row["trait"] == "1" else
-                          False if row["trait"] == "0" else None)
-            }
+            data[row["name"]] = load_person(row)
     return data
 
 
+def load_person(row):
+    """
+    Return one person's data from a CSV row in the format of `load_data`.
+    """
+    return {
+        "name": row["name"],
+        "mother": row["mother"] or None,
+        "father": row["father"] or None,
+        "trait": (True if row["trait"] == "1" else
+                  False if row["trait"] == "0" else None)
+    }
+
+
 def powerset(s):
     """
-    Return a list of all possible subsets of set s.
+    Return a generator of all possible subsets of set s.
     """
     s = list(s)
-    return [
+    return (
         set(s) for s in itertools.chain.from_iterable(
             itertools.combinations(s, r) for r in range(len(s) + 1)
         )
-    ]
+    )
 
 
 def joint_probability(people, one_gene, two_genes, have_trait):
@@ -140,55 +278,74 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone not in set` have_trait` does not have the trait.
     """
     p = 1
-    for person in people.keys():
-        v = 1
-        if people[person]["mother"] == None:
-            if person in one_gene:
-                v = v * PROBS["gene"][1]
-            elif person in two_genes:
-                v = v * PROBS["gene"][2]
-            else:
-                v = v * PROBS["gene"][0]
-                
-        else:
-            inherit_father = inherit_parent(one_gene,two_genes,people[person]["father"])
-            inherit_mother = inherit_parent(one_gene,two_genes,people[person]["mother"])
-            
-            if person in one_gene:
-                v *= inherit_father * (1 - inherit_mother) + inherit_mother * (1 - inherit_father)
-            elif person in two_genes:
-                v *= inherit_father * inherit_mother
-            else:
-                v *= (1 - inherit_mother) * (1 - inherit_father)
-                
-        if person in have_trait:
-            p_trait = True
-        else:
-            p_trait = False
-            
-        if person in one_gene:
-            n_genes = 1
-        elif person in two_genes:
-            n_genes = 2
+    for person in people:
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        genes = gene_count(person, one_gene, two_genes)
+        if mother is None:
+            p *= conditional_probability(
+                genes, None, None, person in have_trait
+            )
         else:
-            n_genes = 0
-        
-        v *= PROBS["trait"][n_genes][p_trait]    
-        
-        p *= v   
-                
-    
+            p *= conditional_probability(
+                genes,
+                gene_count(mother, one_gene, two_genes),
+                gene_count(father, one_gene, two_genes),
+                person in have_trait
+            )
     return p
-            
-    raise NotImplementedError
 
-def inherit_parent(one_gene,two_genes,person):
+
+def gene_count(person, one_gene, two_genes):
+    """
+    Return how many copies of the gene `person` has in an assignment.
+    """
     if person in one_gene:
-        return 0.5
-    elif person in two_genes:
+        return 1
+    if person in two_genes:
+        return 2
+    return 0
+
+
+def passing_probability(genes):
+    """
+    Return the probability that a parent with `genes` copies of the gene
+    passes a copy of it on to a child, accounting for mutation.
+    """
+    if genes == 2:
         return 1 - PROBS["mutation"]
+    if genes == 1:
+        return 0.5
+    return PROBS["mutation"]
+
+
+@functools.lru_cache(maxsize=None)
+def conditional_probability(genes, mother_genes, father_genes, trait):
+    """
+    Return the probability that a person has `genes` copies of the gene
+    and, unless `trait` is None, that they do or do not have the trait,
+    given their parents' gene counts (None for people with no parents
+    listed, who take the unconditional gene distribution).
+
+    Values are computed from PROBS once and cached.
+    """
+    if mother_genes is None:
+        p = PROBS["gene"][genes]
     else:
-        return PROBS["mutation"]   
+        from_mother = passing_probability(mother_genes)
+        from_father = passing_probability(father_genes)
+        if genes == 2:
+            p = from_mother * from_father
+        elif genes == 1:
+            p = (from_mother * (1 - from_father)
+                 + (1 - from_mother) * from_father)
+        else:
+            p = (1 - from_mother) * (1 - from_father)
+
+    if trait is not None:
+        p *= PROBS["trait"][genes][trait]
+    return p
+
 
 def update(probabilities, one_gene, two_genes, have_trait, p):
     """
@@ -0,0 +1,330 @@
+import math
+import os
+import random
+
+from concurrent.futures import ProcessPoolExecutor
+
+from heredity import (
+    GENES, PROBS, conditional_probability, empty_probabilities
+)
+
+# Samples drawn by one worker task
+CHUNK = 10000
+
+# Default total sample budget
+SAMPLES = 100000
+
+# Fraction of each Gibbs chain discarded before collecting samples
+BURN_IN = 0.1
+
+
+def sample_probabilities(people, method="likelihood", samples=SAMPLES,
+                         stderr=None, chunk=CHUNK, processes=None, seed=0,
+                         stats=False):
+    """
+    Estimate gene and trait probabilities by sampling, with either
+    likelihood weighting ("likelihood") or Gibbs sampling ("gibbs").
+
+    Samples are drawn in chunks of `chunk` on a process pool, each chunk
+    with its own seed derived from `seed`. If `stderr` is given, chunks
+    are drawn until every estimate's standard error is at most `stderr`
+    or `samples` have been drawn; otherwise all `samples` are drawn.
+
+    Return a pair (probabilities, errors) of tables in the format of
+    `empty_probabilities`, holding the estimates and their standard
+    errors, which are computed from the spread between chunks. If
+    `stats` is True, also return a dictionary with the number of samples
+    drawn and their effective sample size, which shows how far unequal
+    likelihood weights leave the estimates short of that many samples;
+    Gibbs samples all weigh the same, so for them the two are equal.
+    Raise ValueError if every sample contradicts the observed traits.
+    """
+    if method not in ("likelihood", "gibbs"):
+        raise ValueError(f"unknown sampling method: {method}")
+    network = build_network(people)
+    draw = likelihood_chunk if method == "likelihood" else gibbs_chunk
+    processes = processes or os.cpu_count() or 1
+
+    chunks = max(2, math.ceil(samples / chunk))
+    results = []
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        while len(results) < chunks:
+
+            # Draw at least two chunks before estimating errors, then a
+            # round of one chunk per process at a time
+            if stderr is None:
+                batch = chunks - len(results)
+            else:
+                batch = min(max(processes, 2 - len(results)),
+                            chunks - len(results))
+            tasks = [
+                (network, chunk, seed * 1000003 + len(results) + i)
+                for i in range(batch)
+            ]
+            results.extend(executor.map(draw, tasks))
+
+            if stderr is not None and len(results) >= 2:
+                _, errors, _ = combine(network, results)
+                if max(all_values(errors)) <= stderr:
+                    break
+
+    probabilities, errors, effective = combine(network, results)
+    probabilities = {person: probabilities[person] for person in people}
+    errors = {person: errors[person] for person in people}
+    if stats:
+        return probabilities, errors, {
+            "samples": len(results) * chunk,
+            "effective_samples": effective
+        }
+    return probabilities, errors
+
+
+def build_network(people):
+    """
+    Return the family as a list of people in an order where parents come
+    before their children, with each person's parents and children given
+    by position in that list.
+    """
+    order = []
+    placed = set()
+
+    def place(person):
+        if person in placed:
+            return
+        placed.add(person)
+        for parent in (people[person]["mother"], people[person]["father"]):
+            if parent is not None:
+                place(parent)
+        order.append(person)
+
+    for person in people:
+        place(person)
+
+    position = {person: index for index, person in enumerate(order)}
+    network = []
+    for person in order:
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        network.append({
+            "name": person,
+            "mother": None if mother is None else position[mother],
+            "father": None if father is None else position[father],
+            "trait": people[person]["trait"],
+            "children": []
+        })
+    for index, node in enumerate(network):
+        if node["mother"] is not None:
+            network[node["mother"]]["children"].append(index)
+            network[node["father"]]["children"].append(index)
+    return network
+
+
+def gene_probability(node, genes, assignment, trait=None):
+    """
+    Return the probability of `node` having `genes` copies of the gene
+    (and its trait, if `trait` is not None) given its parents' genes.
+    """
+    if node["mother"] is None:
+        return conditional_probability(genes, None, None, trait)
+    return conditional_probability(
+        genes, assignment[node["mother"]], assignment[node["father"]], trait
+    )
+
+
+def likelihood_chunk(task):
+    """
+    Draw a chunk of samples by likelihood weighting: genes are sampled
+    from each person's parents, and each sample is weighted by the
+    probability of the observed traits given those genes.
+
+    A weight is a product over every observed person, which underflows
+    in large families, so weights are summed as logarithms and every
+    total is kept relative to the largest weight drawn so far.
+
+    Return the weighted totals of each person's gene counts and trait,
+    the total weight and the total squared weight, all relative to the
+    largest weight, along with the logarithm of that weight.
+    """
+    network, samples, seed = task
+    rng = random.Random(seed)
+    gene_totals = [[0.0] * len(GENES) for _ in network]
+    trait_totals = [0.0 for _ in network]
+    total_weight = 0.0
+    squared_weight = 0.0
+    log_scale = -math.inf
+    assignment = [0] * len(network)
+    log_trait = {
+        genes: {
+            trait: math.log(p) if p > 0 else -math.inf
+            for trait, p in PROBS["trait"][genes].items()
+        }
+        for genes in GENES
+    }
+
+    for _ in range(samples):
+        log_weight = 0.0
+        for index, node in enumerate(network):
+            weights = [
+                gene_probability(node, genes, assignment) for genes in GENES
+            ]
+            genes = rng.choices(GENES, weights)[0]
+            assignment[index] = genes
+            if node["trait"] is not None:
+                log_weight += log_trait[genes][node["trait"]]
+        if log_weight == -math.inf:
+            continue
+
+        # Rescale the totals whenever a sample outweighs all before it
+        if log_weight > log_scale:
+            factor = math.exp(log_scale - log_weight)
+            for totals in gene_totals:
+                for genes in GENES:
+                    totals[genes] *= factor
+            trait_totals = [total * factor for total in trait_totals]
+            total_weight *= factor
+            squared_weight *= factor * factor
+            log_scale = log_weight
+
+        weight = math.exp(log_weight - log_scale)
+        total_weight += weight
+        squared_weight += weight * weight
+        for index, genes in enumerate(assignment):
+            gene_totals[index][genes] += weight
+            trait_totals[index] += weight * trait_probability(
+                network[index], genes
+            )
+
+    return gene_totals, trait_totals, total_weight, squared_weight, log_scale
+
+
+def gibbs_chunk(task):
+    """
+    Run one Gibbs sampling chain, resampling each person's genes in turn
+    given their parents, their children and their trait.
+
+    Return the totals of each person's gene counts and trait over the
+    chain's samples after burn-in, in the format of `likelihood_chunk`
+    with every sample weighted 1.
+    """
+    network, samples, seed = task
+    rng = random.Random(seed)
+    gene_totals = [[0.0] * len(GENES) for _ in network]
+    trait_totals = [0.0 for _ in network]
+
+    # Start from a forward sample of the family
+    assignment = [0] * len(network)
+    for index, node in enumerate(network):
+        weights = [
+            gene_probability(node, genes, assignment) for genes in GENES
+        ]
+        assignment[index] = rng.choices(GENES, weights)[0]
+
+    burn_in = int(samples * BURN_IN)
+    for sweep in range(burn_in + samples):
+        for index, node in enumerate(network):
+            weights = []
+            for genes in GENES:
+                assignment[index] = genes
+                w = gene_probability(node, genes, assignment, node["trait"])
+                for child in node["children"]:
+                    w *= gene_probability(
+                        network[child], assignment[child], assignment
+                    )
+                weights.append(w)
+            assignment[index] = rng.choices(GENES, weights)[0]
+
+        if sweep < burn_in:
+            continue
+        for index, genes in enumerate(assignment):
+            gene_totals[index][genes] += 1
+            trait_totals[index] += trait_probability(network[index], genes)
+
+    return gene_totals, trait_totals, float(samples), float(samples), 0.0
+
+
+def trait_probability(node, genes):
+    """
+    Return the probability that `node` has the trait given its genes,
+    which is certain if the trait was observed.
+    """
+    if node["trait"] is not None:
+        return 1.0 if node["trait"] else 0.0
+    return PROBS["trait"][genes][True]
+
+
+def combine(network, results):
+    """
+    Combine chunk totals into estimates, and estimate standard errors
+    from how much the chunks' own estimates vary.
+
+    Return the estimates, their standard errors and the effective sample
+    size, which is the squared total weight over the total squared
+    weight. Raise ValueError if no sample has any weight.
+    """
+    people = [node["name"] for node in network]
+    probabilities = empty_probabilities(people)
+    errors = empty_probabilities(people)
+
+    # Bring each chunk's totals, kept relative to its own largest weight,
+    # to the scale of the largest weight of all
+    shift = max(log_scale for *_, log_scale in results)
+    if shift == -math.inf:
+        raise ValueError("every sample contradicts the observed traits")
+    scales = [math.exp(log_scale - shift) for *_, log_scale in results]
+    total_weight = sum(
+        result[2] * scale for result, scale in zip(results, scales)
+    )
+    effective = total_weight ** 2 / sum(
+        result[3] * scale ** 2 for result, scale in zip(results, scales)
+    )
+
+    for index, person in enumerate(people):
+        estimates = dict()
+        for genes in GENES:
+            estimates["gene", genes] = [
+                gene_totals[index][genes] / weight
+                for gene_totals, _, weight, _, _ in results if weight > 0
+            ]
+            probabilities[person]["gene"][genes] = sum(
+                gene_totals[index][genes] * scale
+                for (gene_totals, *_), scale in zip(results, scales)
+            ) / total_weight
+        estimates["trait", True] = [
+            trait_totals[index] / weight
+            for _, trait_totals, weight, _, _ in results if weight > 0
+        ]
+        p = sum(
+            trait_totals[index] * scale
+            for (_, trait_totals, *_), scale in zip(results, scales)
+        ) / total_weight
+        probabilities[person]["trait"][True] = p
+        probabilities[person]["trait"][False] = 1 - p
+
+        for (field, value), values in estimates.items():
+            errors[person][field][value] = standard_error(values)
+        errors[person]["trait"][False] = errors[person]["trait"][True]
+
+    return probabilities, errors, effective
+
+
+def standard_error(values):
+    """
+    Return the standard error of the mean of `values`.
+    """
+    if len(values) < 2:
+        return math.inf
+    mean = sum(values) / len(values)
+    variance = sum((v - mean) ** 2 for v in values) / (len(values) - 1)
+    return math.sqrt(variance / len(values))
+
+
+def all_values(table):
+    """
+    Return every number in a table in the format of `empty_probabilities`.
+    """
+    return [
+        value
+        for person in table
+        for field in table[person]
+        for value in table[person][field].values()
+    ]
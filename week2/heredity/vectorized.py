@@ -0,0 +1,94 @@
+import numpy as np
+
+from heredity import (
+    GENES, PROBS, conditional_probability, empty_probabilities
+)
+
+# Number of gene assignments held in memory at once
+CHUNK = 1 << 16
+
+
+def vectorize_probabilities(people, chunk=CHUNK):
+    """
+    Compute the same gene and trait probabilities as enumeration, but
+    evaluate a whole chunk of gene assignments at a time with NumPy.
+
+    Assignment k gives person i the i-th base-3 digit of k copies of the
+    gene. Each chunk is decoded into an array with one row per assignment
+    and one column per person, each person's conditional probability
+    table is gathered by their own and parents' columns, and the joint
+    probabilities are the products across each row. Unknown traits are
+    summed out as in enumeration.
+    """
+    names = list(people)
+    n = len(names)
+    position = {person: index for index, person in enumerate(names)}
+
+    # Conditional probability tables, indexed by own and parents' genes
+    tables = []
+    for person in names:
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        trait = people[person]["trait"]
+        if mother is None:
+            tables.append((None, None, np.array([
+                conditional_probability(genes, None, None, trait)
+                for genes in GENES
+            ])))
+        else:
+            tables.append((position[mother], position[father], np.array([
+                [
+                    [
+                        conditional_probability(
+                            genes, mother_genes, father_genes, trait
+                        )
+                        for father_genes in GENES
+                    ]
+                    for mother_genes in GENES
+                ]
+                for genes in GENES
+            ])))
+    has_trait = np.array([PROBS["trait"][genes][True] for genes in GENES])
+
+    powers = 3 ** np.arange(n, dtype=np.int64)
+    columns = np.arange(n)
+    gene_totals = np.zeros((n, len(GENES)))
+    trait_totals = np.zeros(n)
+
+    total = 3 ** n
+    for start in range(0, total, chunk):
+        index = np.arange(start, min(start + chunk, total), dtype=np.int64)
+        genes = (index[:, None] // powers) % 3
+
+        gathered = np.empty(genes.shape)
+        for i, (mother, father, table) in enumerate(tables):
+            if mother is None:
+                gathered[:, i] = table[genes[:, i]]
+            else:
+                gathered[:, i] = table[
+                    genes[:, i], genes[:, mother], genes[:, father]
+                ]
+        p = gathered.prod(axis=1)
+
+        np.add.at(
+            gene_totals,
+            (np.broadcast_to(columns, genes.shape), genes),
+            np.broadcast_to(p[:, None], genes.shape)
+        )
+        trait_totals += p @ has_trait[genes]
+
+    probabilities = empty_probabilities(people)
+    for i, person in enumerate(names):
+        weight = gene_totals[i].sum()
+        for genes in GENES:
+            probabilities[person]["gene"][genes] = float(
+                gene_totals[i][genes] / weight
+            )
+        trait = people[person]["trait"]
+        if trait is not None:
+            probabilities[person]["trait"][trait] = 1.0
+        else:
+            p = float(trait_totals[i] / weight)
+            probabilities[person]["trait"][True] = p
+            probabilities[person]["trait"][False] = 1 - p
+    return probabilities
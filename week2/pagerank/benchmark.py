@@ -0,0 +1,217 @@
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from scipy.stats import kendalltau
+
+from matrix import (
+    adjacency, batch_walk, power_iteration, transition_matrix
+)
+from pagerank import DAMPING, SAMPLES, iterate_pagerank, sample_pagerank
+
+METHODS = ["sample", "vectorized", "iterate", "matrix"]
+
+# Largest graph each method is run on, since pure Python methods are slow
+LIMITS = {
+    "sample": 100000,
+    "iterate": 100000
+}
+
+# Convergence tolerance of the reference ranks
+REFERENCE_TOLERANCE = 1e-14
+
+# Slowdown relative to a baseline report that counts as a regression
+SLOWDOWN = 1.5
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure the speed, memory and accuracy of PageRank "
+                    "methods on synthetic power-law graphs."
+    )
+    parser.add_argument("-m", "--method", action="append", choices=METHODS,
+                        help="method to measure (repeatable, default: all)")
+    parser.add_argument("-s", "--size", action="append", type=int,
+                        help="pages in a synthetic graph (repeatable)")
+    parser.add_argument("-n", "--samples", type=int, default=SAMPLES,
+                        help=f"pages to sample (default: {SAMPLES})")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="runs per measurement; the best is reported")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed for graphs and sampling")
+    parser.add_argument("--json", metavar="FILE",
+                        help="write the results as JSON to FILE")
+    parser.add_argument("--baseline", metavar="FILE",
+                        help="compare against results written by --json "
+                             "and exit with an error on regressions")
+    args = parser.parse_args()
+
+    methods = args.method or METHODS
+    results = []
+    print(f"{'pages':>8}{'links':>10}  {'method':<12}{'time':>10}"
+          f"{'memory':>10}{'iterations':>12}{'L1 error':>12}"
+          f"{'tau':>8}")
+    for size in args.size or [100, 1000, 10000]:
+        corpus = power_law_corpus(size, seed=args.seed)
+        reference = reference_ranks(corpus)
+        links = sum(len(links) for links in corpus.values())
+        for method in methods:
+            if size > LIMITS.get(method, size):
+                continue
+            result = measure(
+                corpus, reference, method, args.samples, args.repeat,
+                args.seed
+            )
+            result.update({"pages": size, "links": links, "method": method})
+            results.append(result)
+            iterations = result["iterations"]
+            print(f"{size:>8}{links:>10}  {method:<12}"
+                  f"{result['time'] * 1000:>8.1f}ms"
+                  f"{result['memory'] / 1e6:>8.1f}MB"
+                  f"{'-' if iterations is None else iterations:>12}"
+                  f"{result['l1_error']:>12.2e}"
+                  f"{result['kendall_tau']:>8.4f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+def power_law_corpus(size, seed=0, links=8, dangling=0.05):
+    """
+    Return a corpus of `size` pages in the format of `crawl`. Each
+    page's number of links follows a Pareto distribution with mean
+    about `links`, and link targets favor low-numbered pages so that
+    in-degrees follow a power law. A fraction `dangling` of pages
+    have no links at all.
+    """
+    rng = np.random.default_rng(seed)
+    pages = [f"{page}.html" for page in range(size)]
+    degrees = np.minimum(
+        (rng.pareto(2, size) + 1) * links / 2, size - 1
+    ).astype(np.int64)
+    degrees[rng.random(size) < dangling] = 0
+    targets = (size ** rng.random(degrees.sum())).astype(np.int64) - 1
+
+    corpus = dict()
+    offset = 0
+    for page, degree in enumerate(degrees.tolist()):
+        corpus[pages[page]] = set(
+            pages[target] for target in targets[offset:offset + degree]
+            if target != page
+        )
+        offset += degree
+    return corpus
+
+
+def reference_ranks(corpus):
+    """
+    Return high-precision PageRank values as an array over the sorted
+    pages of `corpus`.
+    """
+    _, indptr, indices = adjacency(corpus)
+    matrix, dangling = transition_matrix(indptr, indices)
+    ranks, _ = power_iteration(
+        matrix, dangling, DAMPING, REFERENCE_TOLERANCE, max_iterations=10000
+    )
+    return ranks
+
+
+def run(corpus, method, samples, seed):
+    """
+    Rank `corpus` with `method`, returning the ranks as an array over
+    the sorted pages and the number of iterations taken, if any.
+    """
+    if method == "sample":
+        ranks = sample_pagerank(corpus, DAMPING, samples, seed=seed)
+        return np.array([ranks[page] for page in sorted(ranks)]), None
+    if method == "vectorized":
+        _, indptr, indices = adjacency(corpus)
+        counts = batch_walk(indptr, indices, DAMPING, samples, seed=seed)
+        return counts / samples, None
+    if method == "iterate":
+        ranks, stats = iterate_pagerank(corpus, DAMPING, stats=True)
+        ranks = np.array([ranks[page] for page in sorted(ranks)])
+        return ranks, stats["iterations"]
+    _, indptr, indices = adjacency(corpus)
+    matrix, dangling = transition_matrix(indptr, indices)
+    return power_iteration(matrix, dangling, DAMPING)
+
+
+def measure(corpus, reference, method, samples, repeat, seed):
+    """
+    Return the best wall time of `repeat` runs of `method`, the peak
+    memory allocated during one more run, its iterations, and the L1
+    distance and Kendall rank correlation between its ranks and
+    `reference`.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ranks, iterations = run(corpus, method, samples, seed)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    # Tracing slows allocation down, so memory is measured separately
+    tracemalloc.start()
+    run(corpus, method, samples, seed)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tau, _ = kendalltau(ranks, reference)
+    return {
+        "time": best,
+        "memory": peak,
+        "iterations": iterations,
+        "l1_error": float(np.abs(ranks - reference).sum()),
+        "kendall_tau": float(tau)
+    }
+
+
+def compare(baseline, results):
+    """
+    Return descriptions of the results that are slower than their
+    counterpart in `baseline` by more than SLOWDOWN, that take more
+    iterations, or that are less accurate.
+    """
+    previous = {
+        (result["pages"], result["method"]): result for result in baseline
+    }
+    regressions = []
+    for result in results:
+        old = previous.get((result["pages"], result["method"]))
+        if old is None:
+            continue
+        name = f"{result['method']} on {result['pages']} pages"
+        if result["time"] > old["time"] * SLOWDOWN:
+            regressions.append(
+                f"{name} took {result['time']:.4f}s, was {old['time']:.4f}s"
+            )
+        if (result["iterations"] or 0) > (old["iterations"] or 0):
+            regressions.append(
+                f"{name} took {result['iterations']} iterations, "
+                f"was {old['iterations']}"
+            )
+        if result["l1_error"] > old["l1_error"] * 1.01 + 1e-12:
+            regressions.append(
+                f"{name} has L1 error {result['l1_error']:.2e}, "
+                f"was {old['l1_error']:.2e}"
+            )
+    return regressions
+
+
+if __name__ == "__main__":
+    main()
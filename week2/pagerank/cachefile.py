@@ -0,0 +1,67 @@
+import json
+import os
+import sys
+import tempfile
+
+from array import array
+
+
+def read_cache(path, version, parse):
+    """
+    Read a cache file written by `write_cache` with the same `version`
+    and return parse(data, arrays), where `data` is the JSON value and
+    `arrays` the list of arrays it was written with.
+
+    Return None if the file is missing, was written with another
+    version, or is malformed in any way, including `parse` failing on
+    it, so that callers rebuild the cache. Loading a cache only ever
+    decodes JSON and raw numbers, so it cannot run code.
+    """
+    try:
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            if header["version"] != version:
+                return None
+            arrays = []
+            for typecode, length in header["arrays"]:
+                values = array(typecode)
+                values.fromfile(f, length)
+                if sys.byteorder == "big":
+                    values.byteswap()
+                arrays.append(values)
+        return parse(header["data"], arrays)
+    except (OSError, EOFError, LookupError, TypeError, ValueError):
+        return None
+
+
+def write_cache(path, version, data, arrays=()):
+    """
+    Write a cache file at `path` holding `version`, a JSON-serializable
+    value `data` and a sequence of `arrays`, which are stored as raw
+    little-endian bytes after a line of JSON.
+    """
+    header = json.dumps({
+        "version": version,
+        "data": data,
+        "arrays": [[values.typecode, len(values)] for values in arrays]
+    })
+
+    # Write to a temporary file of its own next to the cache and move it
+    # into place, so a crash never leaves half a cache and concurrent
+    # writers never write to the same file
+    descriptor, temporary = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)),
+        prefix=os.path.basename(path) + ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(header.encode("utf-8") + b"\n")
+            for values in arrays:
+                if sys.byteorder == "big":
+                    values = array(values.typecode, values)
+                    values.byteswap()
+                values.tofile(f)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
@@ -0,0 +1,277 @@
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from cachefile import read_cache, write_cache
+
+# Pattern for links, matched against raw bytes of HTML files
+LINK = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Bytes read from a file at a time
+CHUNK_SIZE = 1 << 16
+
+# Format version of link caches, changed whenever the format changes
+CACHE_VERSION = 2
+
+# Link graph of a corpus: page names, and the positions of the pages
+# linked to by page i in indices[indptr[i]:indptr[i + 1]]
+LinkGraph = namedtuple("LinkGraph", ["pages", "indptr", "indices"])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Crawl a corpus of HTML pages and report throughput."
+    )
+    parser.add_argument("corpus", nargs="?",
+                        help="directory of HTML pages")
+    parser.add_argument("--synthetic", type=int, metavar="PAGES",
+                        help="crawl a generated corpus of PAGES pages")
+    parser.add_argument("--links", type=int, default=10,
+                        help="links per synthetic page (default: 10)")
+    parser.add_argument("--size", type=int, default=4096,
+                        help="approximate bytes per synthetic page")
+    parser.add_argument("-w", "--workers", type=int,
+                        help="threads or processes reading files")
+    parser.add_argument("--processes", action="store_true",
+                        help="read files in processes instead of threads")
+    parser.add_argument("--cache", metavar="FILE",
+                        help="link cache to reuse and update")
+    args = parser.parse_args()
+
+    if (args.corpus is None) == (args.synthetic is None):
+        parser.error("give either a corpus or --synthetic")
+
+    if args.synthetic is None:
+        report(args.corpus, args.workers, args.processes, args.cache)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        write_synthetic_corpus(
+            directory, args.synthetic, args.links, args.size
+        )
+        print(f"Generated {args.synthetic} pages "
+              f"in {time.perf_counter() - start:.2f}s")
+        report(directory, args.workers, args.processes, args.cache)
+        if args.cache:
+            report(directory, args.workers, args.processes, args.cache)
+
+
+def report(directory, workers, processes, cache=None):
+    """
+    Crawl `directory` and print how quickly it was crawled.
+    """
+    start = time.perf_counter()
+    graph, stats = crawl_graph(
+        directory, workers, processes, stats=True, cache=cache
+    )
+    elapsed = time.perf_counter() - start
+    pages = len(graph.pages)
+    megabytes = stats["bytes"] / 1e6
+    print(f"Crawled {pages} pages, {len(graph.indices)} links, "
+          f"{megabytes:.1f} MB in {elapsed:.2f}s")
+    print(f"  {stats['parsed']} pages parsed, "
+          f"{stats['cached']} loaded from cache")
+    print(f"  {pages / elapsed:.0f} pages/s, "
+          f"{megabytes / elapsed:.1f} MB/s")
+
+
+def extract_links(path, chunk_size=CHUNK_SIZE):
+    """
+    Return the set of link targets in an HTML file, reading it in chunks
+    of `chunk_size` bytes, along with the number of bytes read.
+
+    Each chunk is searched only up to its last "<", and the rest is
+    carried over to the next chunk, so no link is split between chunks.
+    """
+    links = set()
+    read = 0
+    carry = b""
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(chunk_size)
+            read += len(block)
+            text = carry + block
+            if not block:
+                cut = len(text)
+            else:
+                cut = text.rfind(b"<")
+                if cut == -1:
+                    cut = len(text)
+            for match in LINK.finditer(text, 0, cut):
+                links.add(match.group(1).decode("utf-8", "replace"))
+            carry = text[cut:]
+            if not block:
+                return links, read
+
+
+def crawl_graph(directory, workers=None, processes=False, stats=False,
+                chunk_size=CHUNK_SIZE, cache=None):
+    """
+    Parse a directory of HTML pages into a LinkGraph, reading files in
+    parallel on a pool of `workers` threads (or processes, if
+    `processes` is True).
+
+    Pages are numbered in sorted order of their file names. As in
+    `crawl`, only links to other pages in the corpus are kept.
+
+    If `cache` is a file path, the links extracted from each file are
+    kept there along with the file's modification time and size, and
+    only files that were added or changed since are parsed again.
+
+    If `stats` is True, also return a dictionary with the number of
+    bytes read and of files parsed and loaded from the cache.
+    """
+    files = sorted(
+        (entry.name, entry.stat()) for entry in os.scandir(directory)
+        if entry.name.endswith(".html")
+    )
+    pages = [page for page, _ in files]
+    position = {page: index for index, page in enumerate(pages)}
+
+    # Reuse the links of files whose fingerprint has not changed
+    cached = load_cache(cache) if cache else dict()
+    fingerprints = dict()
+    links = dict()
+    stale = []
+    for page, stat in files:
+        fingerprints[page] = (stat.st_mtime_ns, stat.st_size)
+        if page in cached and cached[page][0] == fingerprints[page]:
+            links[page] = cached[page][1]
+        else:
+            stale.append(page)
+
+    read = 0
+    if stale:
+        paths = [os.path.join(directory, page) for page in stale]
+        pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with pool(max_workers=workers) as executor:
+            parsed = executor.map(
+                extract_links, paths, [chunk_size] * len(paths),
+                chunksize=64 if processes else 1
+            )
+            for page, (page_links, size) in zip(stale, parsed):
+                links[page] = page_links
+                read += size
+
+    if cache and (stale or len(cached) != len(pages)):
+        save_cache(cache, {
+            page: (fingerprints[page], links[page]) for page in pages
+        })
+
+    indptr = array("q", [0])
+    indices = array("q")
+    for index, page in enumerate(pages):
+        indices.extend(sorted(
+            position[link] for link in links[page]
+            if link in position and position[link] != index
+        ))
+        indptr.append(len(indices))
+
+    graph = LinkGraph(pages, indptr, indices)
+    if stats:
+        return graph, {
+            "bytes": read,
+            "parsed": len(stale),
+            "cached": len(pages) - len(stale)
+        }
+    return graph
+
+
+def load_cache(path):
+    """
+    Load a link cache written by `save_cache`, returning a dictionary
+    mapping each file name to its fingerprint (modification time and
+    size) and set of links. A missing or unreadable cache is empty.
+    """
+    def parse(data, arrays):
+        strings = data["strings"]
+        mtimes, sizes, linkptr, links = arrays
+        return {
+            page: (
+                (mtimes[i], sizes[i]),
+                set(strings[link] for link in links[linkptr[i]:linkptr[i + 1]])
+            )
+            for i, page in enumerate(data["pages"])
+        }
+
+    return read_cache(path, CACHE_VERSION, parse) or dict()
+
+
+def save_cache(path, files):
+    """
+    Write the fingerprint and links of every file to a cache at `path`.
+    Link targets are stored once in a table of strings and referred to
+    by position, and all numbers are packed into arrays.
+    """
+    strings = []
+    interned = dict()
+    pages = sorted(files)
+    mtimes = array("q")
+    sizes = array("q")
+    linkptr = array("q", [0])
+    links = array("q")
+    for page in pages:
+        (mtime, size), page_links = files[page]
+        mtimes.append(mtime)
+        sizes.append(size)
+        for link in sorted(page_links):
+            if link not in interned:
+                interned[link] = len(strings)
+                strings.append(link)
+            links.append(interned[link])
+        linkptr.append(len(links))
+
+    write_cache(
+        path, CACHE_VERSION, {"pages": pages, "strings": strings},
+        [mtimes, sizes, linkptr, links]
+    )
+
+
+def to_corpus(graph):
+    """
+    Convert a LinkGraph into the dictionary format returned by `crawl`.
+    """
+    return {
+        page: set(
+            graph.pages[target]
+            for target in graph.indices[graph.indptr[i]:graph.indptr[i + 1]]
+        )
+        for i, page in enumerate(graph.pages)
+    }
+
+
+def write_synthetic_corpus(directory, pages, links=10, size=4096, seed=0):
+    """
+    Write `pages` HTML files to `directory`, each with about `links`
+    links to other pages and padded with text to about `size` bytes.
+    Link targets favor low-numbered pages, giving a skewed in-degree.
+    """
+    rng = random.Random(seed)
+    filler = "<p>" + "lorem ipsum dolor sit amet " * 8 + "</p>\n"
+    for page in range(pages):
+        targets = set(
+            int(pages ** rng.random()) - 1 for _ in range(links)
+        )
+        body = "".join(
+            f'<li><a href="{target}.html">{target}</a></li>\n'
+            for target in sorted(targets)
+        )
+        padding = filler * max(0, (size - len(body)) // len(filler))
+        with open(os.path.join(directory, f"{page}.html"), "w") as f:
+            f.write(
+                f"<!DOCTYPE html>\n<html>\n<head><title>{page}</title>"
+                f"</head>\n<body>\n{padding}<ul>\n{body}</ul>\n"
+                f"</body>\n</html>\n"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,89 @@
+import argparse
+import logging
+import math
 import os
 import random
-import re
-import sys
+
+from concurrent.futures import ProcessPoolExecutor
+
+from crawler import crawl_graph, to_corpus
 
 DAMPING = 0.85
 SAMPLES = 10000
 
+# Fewest pages each random surfer samples, so that surfers walk far
+# enough for their burn-in to be a small part of the work
+SURFER_SAMPLES = 100
+
+# Distance from PageRank, in total variation, that a surfer's page must
+# be within before its visits are counted
+MIXING_ERROR = 1e-3
+
+# Stop iterating once PageRank values change by less than this in total
+TOLERANCE = 0.001
+MAX_ITERATIONS = 1000
+
+# Default name of the link cache kept inside a corpus
+CACHE = ".links.cache"
+
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
-    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
-    print(f"PageRank Results from Sampling (n = {SAMPLES})")
+    parser = argparse.ArgumentParser(
+        description="Rank the pages of a corpus with PageRank."
+    )
+    parser.add_argument("corpus", help="directory of HTML pages")
+    parser.add_argument("--matrix", action="store_true",
+                        help="also rank with sparse matrix power iteration")
+    parser.add_argument("-n", "--samples", type=int, default=SAMPLES,
+                        help=f"pages to sample (default: {SAMPLES})")
+    parser.add_argument("-w", "--walkers", type=int,
+                        help="independent random surfers run in parallel")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="advance surfers together with NumPy")
+    parser.add_argument("--seed", type=int,
+                        help="seed for reproducible sampling")
+    parser.add_argument("--cache", nargs="?", const=True, metavar="FILE",
+                        help="cache extracted links between runs, by default "
+                             f"in {CACHE} inside the corpus")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="log iterations and time of matrix iteration")
+    args = parser.parse_args()
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+    cache = args.cache
+    if cache is True:
+        cache = os.path.join(args.corpus, CACHE)
+    corpus = crawl(args.corpus, cache)
+    ranks = sample_pagerank(
+        corpus, DAMPING, args.samples, args.walkers, args.seed,
+        args.vectorized
+    )
+    print(f"PageRank Results from Sampling (n = {args.samples})")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
     ranks = iterate_pagerank(corpus, DAMPING)
     print(f"PageRank Results from Iteration")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
+    if args.matrix:
+        from matrix import matrix_pagerank
+        ranks = matrix_pagerank(corpus, DAMPING)
+        print(f"PageRank Results from Sparse Matrix Iteration")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
 
 
-def crawl(directory):
+def crawl(directory, cache=None):
     """
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
-    """
-    pages = dict()
-
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
-
-    # Only include links to other pages in the corpus
-    for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages
-        )
 
-    return pages
+    Files are read in parallel and in chunks by `crawler.crawl_graph`.
+    If `cache` is a file path, links are cached there and only files
+    changed since the last crawl are read again.
+    """
+    return to_corpus(crawl_graph(directory, cache=cache))
 
 
 def transition_model(corpus, page, damping_factor):
@@ -57,52 +95,130 @@ def transition_model(corpus, page, damping_factor):
     linked to by `page`. With probability `1 - damping_factor`, choose
     a link at random chosen from all pages in the corpus.
     """
-    model = dict()
-    links = len(corpus[page])
-    if links > 0:
-        added_proba = (1-damping_factor)/(len(corpus))
-        model[page] = added_proba
-        for p in corpus[page]:
-            model[p] = (damping_factor*(1/links)) + added_proba
-    else:
-        proba = 1/len(corpus)
-        for key in corpus.keys():
-            model[key] = proba
-            
+    n = len(corpus)
+    links = corpus[page]
+    if not links:
+        return {p: 1 / n for p in corpus}
+
+    model = {p: (1 - damping_factor) / n for p in corpus}
+    for link in links:
+        model[link] += damping_factor / len(links)
     return model
-    
-    raise NotImplementedError
 
 
-def sample_pagerank(corpus, damping_factor, n):
+def surfer_links(corpus):
+    """
+    Precompute what a random surfer needs at each page: the positions of
+    the pages it links to.
+
+    Return the sorted list of pages and, for each page, the list of
+    positions of its links, which is empty for pages with no links.
+    """
+    pages = sorted(corpus)
+    position = {page: index for index, page in enumerate(pages)}
+    links = [sorted(position[link] for link in corpus[page]) for page in pages]
+    return pages, links
+
+
+def burn_in(damping_factor, error=MIXING_ERROR):
+    """
+    Return how many steps a random surfer must take before its page is
+    within `error` of PageRank in total variation, wherever it started.
+
+    Each step jumps to a uniformly random page with probability at
+    least 1 - `damping_factor`, and after its first jump the surfer no
+    longer depends on where it started, so the distance is at most
+    `damping_factor` to the power of the number of steps. If
+    `damping_factor` is 1 there is no such bound, and MAX_ITERATIONS
+    steps are taken.
+    """
+    if damping_factor <= 0:
+        return 0
+    if damping_factor >= 1:
+        return MAX_ITERATIONS
+    return math.ceil(math.log(error) / math.log(damping_factor))
+
+
+def walk(task):
+    """
+    Take `n` steps of one random surfer and return how many times it
+    visited each page, given a task (links, damping_factor, n, seed).
+
+    Each step follows the transition model without building it: with
+    probability `damping_factor` the surfer follows one of the page's
+    links, all equally likely, and otherwise, or if the page has no
+    links, it jumps to a page chosen uniformly from the whole corpus.
+    The surfer starts on a random page, and its first `burn_in` steps
+    are not counted, so that the start does not bias the visits.
+    """
+    links, damping_factor, n, seed = task
+    rng = random.Random(seed)
+    uniform = rng.random
+    size = len(links)
+    counts = [0] * size
+    page = int(uniform() * size)
+    for step in range(-burn_in(damping_factor), n):
+        if step >= 0:
+            counts[page] += 1
+        targets = links[page]
+        if targets and uniform() < damping_factor:
+            page = targets[int(uniform() * len(targets))]
+        else:
+            page = int(uniform() * size)
+    return counts
+
+
+def sample_pagerank(corpus, damping_factor, n, walkers=None, seed=None,
+                    vectorized=False):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
 
+    The samples are split between `walkers` independent surfers, which
+    run in parallel processes when there is more than one. Each surfer
+    draws from its own generator derived from `seed`, so results are
+    reproducible for a fixed seed and number of walkers. Every surfer
+    burns in before it counts visits, and there are never so many that
+    one samples fewer than SURFER_SAMPLES pages.
+
+    If `vectorized` is True, the surfers instead advance together in
+    NumPy arrays, which is practical for very large `n`; `walkers` then
+    defaults to several thousand.
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    pageRank = {page:0.0 for page in corpus.keys()}
-    previous = random.choices(list(corpus.keys()))[0]
-    for i in range(n+1):
-        distribution = transition_model(corpus,previous,damping_factor)
-        pageRank[previous] += 1
-        previous = random.choices(list(distribution.keys()),list(distribution.values()))[0]
-        
-    for key in pageRank.keys():
-        pageRank[key] /= n
-        
-    return pageRank
-        
-        
-        
-    
-    
-    raise NotImplementedError
+    if seed is None:
+        seed = random.randrange(2 ** 32)
 
+    if vectorized:
+        from matrix import WALKERS, adjacency, batch_walk
+        pages, indptr, indices = adjacency(corpus)
+        counts = batch_walk(
+            indptr, indices, damping_factor, n, walkers or WALKERS, seed
+        )
+        return {page: count / n for page, count in zip(pages, counts.tolist())}
 
-def iterate_pagerank(corpus, damping_factor):
+    walkers = max(1, min(walkers or 1, n // SURFER_SAMPLES))
+    pages, links = surfer_links(corpus)
+    tasks = [
+        (links, damping_factor, n // walkers + (k < n % walkers),
+         f"{seed}-{k}")
+        for k in range(walkers)
+    ]
+
+    if walkers == 1:
+        results = [walk(tasks[0])]
+    else:
+        with ProcessPoolExecutor() as executor:
+            results = list(executor.map(walk, tasks))
+
+    totals = [sum(counts) for counts in zip(*results)]
+    return {page: total / n for page, total in zip(pages, totals)}
+
+
+def iterate_pagerank(corpus, damping_factor, stats=False):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -110,28 +226,43 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    If `stats` is True, also return a dictionary with the number of
+    iterations taken and the total change in the last iteration.
     """
-    a = 1/len(corpus)
-    pageRank = {page:a for page in corpus.keys()}
-    stop = False
-    while stop == False:
-        for page in corpus.keys():
-            initial = pageRank[page]
-            links = corpus[page]
-            if len(links):
-                pageRank[page] = (1-damping_factor)/len(corpus.keys())
-                for p in links:
-                    if len(corpus[p]):
-                        pageRank[page] += damping_factor*(pageRank[p]/(len(corpus[p])))
-                    else:
-                        pageRank[page] += damping_factor*(pageRank[p]/len(corpus))
-            
-    
-            if abs(pageRank[page] - initial) < 0.001:
-                stop = True
-    
+    n = len(corpus)
+    pageRank = {page: 1 / n for page in corpus}
+
+    # Pages with no links are interpreted as linking to every page
+    incoming = {page: [] for page in corpus}
+    dangling = []
+    for page, links in corpus.items():
+        if links:
+            for link in links:
+                incoming[link].append(page)
+        else:
+            dangling.append(page)
+
+    iterations = 0
+    while iterations < MAX_ITERATIONS:
+        iterations += 1
+        spread = (1 - damping_factor) / n + damping_factor * sum(
+            pageRank[page] for page in dangling
+        ) / n
+        updated = {
+            page: spread + damping_factor * sum(
+                pageRank[p] / len(corpus[p]) for p in incoming[page]
+            )
+            for page in corpus
+        }
+        change = sum(abs(updated[page] - pageRank[page]) for page in corpus)
+        pageRank = updated
+        if change < TOLERANCE:
+            break
+
+    if stats:
+        return pageRank, {"iterations": iterations, "change": change}
     return pageRank
-    raise NotImplementedError
 
 
 if __name__ == "__main__":
@@ -0,0 +1,209 @@
+import argparse
+import time
+
+import numpy as np
+import scipy.sparse
+
+from crawler import crawl_graph
+from matrix import MAX_ITERATIONS, TOLERANCE, WALKERS, transition_matrix
+from pagerank import DAMPING
+
+# Default number of walk segments started from each page
+SEGMENTS = 100
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute personalized PageRank for many seed sets."
+    )
+    parser.add_argument("corpus", help="directory of HTML pages")
+    parser.add_argument("seeds",
+                        help="file with one seed set per line: a name "
+                             "followed by the pages to teleport to")
+    parser.add_argument("-o", "--output", default="personalized.npz",
+                        help="file to write the rank matrix to")
+    parser.add_argument("--monte-carlo", action="store_true",
+                        help="estimate ranks from precomputed walk segments")
+    parser.add_argument("-n", "--segments", type=int, default=SEGMENTS,
+                        help="walk segments per page in Monte Carlo mode "
+                             f"(default: {SEGMENTS})")
+    parser.add_argument("--seed", type=int,
+                        help="seed for reproducible walk segments")
+    args = parser.parse_args()
+
+    graph = crawl_graph(args.corpus)
+    names, seed_sets = load_seeds(args.seeds)
+    teleports = teleport_matrix(graph.pages, seed_sets)
+
+    start = time.perf_counter()
+    if args.monte_carlo:
+        segments = walk_segments(
+            graph.indptr, graph.indices, DAMPING, args.segments, args.seed
+        )
+        ranks = segment_pagerank(segments, teleports)
+        print(f"Estimated {len(names)} rank vectors from "
+              f"{args.segments} segments per page "
+              f"in {time.perf_counter() - start:.2f}s")
+    else:
+        matrix, dangling = transition_matrix(graph.indptr, graph.indices)
+        ranks, iterations = personalized_power_iteration(
+            matrix, dangling, teleports, DAMPING
+        )
+        print(f"Computed {len(names)} rank vectors in {iterations} "
+              f"iterations in {time.perf_counter() - start:.2f}s")
+
+    save_ranks(args.output, graph.pages, names, ranks)
+    for name, column in zip(names, ranks.T):
+        top = np.argsort(-column)[:3]
+        print(f"  {name}: " + ", ".join(
+            f"{graph.pages[i]} {column[i]:.4f}" for i in top
+        ))
+
+
+def load_seeds(filename):
+    """
+    Load seed sets from a file with one set per line, given as a name
+    followed by the pages in the set, separated by whitespace. Blank
+    lines and lines starting with "#" are skipped.
+
+    Return a list of names and a list of lists of pages.
+    """
+    names = []
+    seed_sets = []
+    with open(filename) as f:
+        for line in f:
+            fields = line.split()
+            if not fields or fields[0].startswith("#"):
+                continue
+            names.append(fields[0])
+            seed_sets.append(fields[1:])
+    return names, seed_sets
+
+
+def teleport_matrix(pages, seed_sets):
+    """
+    Return a dense matrix with one column per seed set, spreading each
+    column's teleport probability evenly over the pages in its set.
+    """
+    position = {page: index for index, page in enumerate(pages)}
+    teleports = np.zeros((len(pages), len(seed_sets)))
+    for column, seeds in enumerate(seed_sets):
+        if not seeds:
+            raise ValueError(f"seed set {column} is empty")
+        for page in seeds:
+            if page not in position:
+                raise ValueError(f"seed page not in corpus: {page}")
+            teleports[position[page], column] = 1
+    return teleports / teleports.sum(axis=0)
+
+
+def personalized_power_iteration(matrix, dangling, teleports,
+                                 damping_factor, tolerance=TOLERANCE,
+                                 max_iterations=MAX_ITERATIONS):
+    """
+    Compute one personalized PageRank vector per column of `teleports`
+    at once, by power iteration on a link matrix returned by
+    `matrix.transition_matrix`.
+
+    Each column's random surfer teleports according to that column,
+    and so do surfers on pages with no links. Every iteration is a
+    single sparse-times-dense product over all columns, and iteration
+    stops once no column changes by `tolerance` or more in L1 norm.
+
+    Return a matrix of ranks, one column per teleport vector, and the
+    number of iterations taken.
+    """
+    teleports = np.asarray(teleports, dtype=float)
+    ranks = teleports.copy()
+
+    iterations = 0
+    while iterations < max_iterations:
+        iterations += 1
+        restart = damping_factor * ranks[dangling].sum(axis=0) \
+            + 1 - damping_factor
+        updated = damping_factor * (matrix @ ranks) + teleports * restart
+        change = np.abs(updated - ranks).sum(axis=0).max()
+        ranks = updated
+        if change < tolerance:
+            break
+
+    return ranks / ranks.sum(axis=0), iterations
+
+
+def walk_segments(indptr, indices, damping_factor, segments=SEGMENTS,
+                  seed=None, walkers=WALKERS):
+    """
+    Run `segments` random walks from every page of a graph given by
+    adjacency arrays, and return a sparse matrix whose entry (u, v) is
+    the average number of times a walk from page u visited page v.
+
+    A walk follows a random link with probability `damping_factor` and
+    otherwise ends, which is where a surfer would teleport; it also
+    ends at pages with no links. The segments do not depend on where
+    surfers teleport to, so one set serves every teleport vector.
+    Walks are advanced `walkers` at a time.
+    """
+    rng = np.random.default_rng(seed)
+    indptr = np.asarray(indptr)
+    indices = np.asarray(indices)
+    size = len(indptr) - 1
+    degrees = np.diff(indptr)
+    starts = np.repeat(np.arange(size), segments)
+
+    visits = scipy.sparse.csr_matrix((size, size))
+    for begin in range(0, len(starts), walkers):
+        origin = starts[begin:begin + walkers]
+        position = origin.copy()
+        rows = []
+        columns = []
+        while len(position):
+            rows.append(origin)
+            columns.append(position)
+            degree = degrees[position]
+            alive = (rng.random(len(position)) < damping_factor) \
+                & (degree > 0)
+            origin = origin[alive]
+            position = position[alive]
+            choice = (rng.random(len(position)) * degree[alive]) \
+                .astype(np.int64)
+            position = indices[indptr[position] + choice]
+        rows = np.concatenate(rows)
+        visits += scipy.sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, np.concatenate(columns))),
+            shape=(size, size)
+        )
+
+    return visits / segments
+
+
+def segment_pagerank(segments, teleports):
+    """
+    Estimate one personalized PageRank vector per column of `teleports`
+    from walk segments returned by `walk_segments`.
+
+    A surfer's path splits into segments that each begin with a
+    teleport, so each page's rank is proportional to its expected visits
+    in a segment that starts from the teleport distribution.
+
+    Return a matrix of ranks, one column per teleport vector.
+    """
+    ranks = segments.T @ np.asarray(teleports, dtype=float)
+    return ranks / ranks.sum(axis=0)
+
+
+def save_ranks(filename, pages, names, ranks):
+    """
+    Write a rank matrix to a compressed NumPy file with arrays `pages`,
+    `names` and `ranks`, where ranks[i, j] is the rank of pages[i] for
+    seed set names[j], stored in single precision.
+    """
+    np.savez_compressed(
+        filename,
+        pages=np.array(pages),
+        names=np.array(names),
+        ranks=ranks.astype(np.float32)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,14 @@
+import itertools
+import json
+import os
+import tempfile
+
+from functools import cached_property
+
+# Format version of vocabulary caches, changed whenever the format changes
+CACHE_VERSION = 2
+
+
 class Variable():
 
     ACROSS = "across"
@@ -15,9 +26,10 @@ class Variable():
                 (self.i + (k if self.direction == Variable.DOWN else 0),
                  self.j + (k if self.direction == Variable.ACROSS else 0))
             )
+        self.hash = hash((self.i, self.j, self.direction, self.length))
 
     def __hash__(self):
-        return hash((self.i, self.j, self.direction, self.length))
+        return self.hash
 
     def __eq__(self, other):
         return (
@@ -35,9 +47,27 @@ class Variable():
         return f"Variable({self.i}, {self.j}, {direction}, {self.length})"
 
 
+class Overlaps(dict):
+    """
+    Overlaps between variables, keyed by pairs of variables. Only pairs
+    that overlap are stored, and any other pair maps to None.
+    """
+
+    def __missing__(self, key):
+        return None
+
+
 class Crossword():
 
-    def __init__(self, structure_file, words_file):
+    def __init__(self, structure_file, words_file, cache=None):
+        """
+        Load a crossword structure and the vocabulary of words that can
+        fill it. Only words of the lengths the structure needs are kept,
+        in `self.vocabulary`, which maps each variable length to a sorted
+        tuple of words. If `cache` is a file path, the vocabulary is
+        preprocessed once and reloaded from there while `words_file` is
+        unchanged.
+        """
 
         # Determine structure of crossword
         with open(structure_file) as f:
@@ -57,10 +87,6 @@ class Crossword():
                         row.append(False)
                 self.structure.append(row)
 
-        # Save vocabulary list
-        with open(words_file) as f:
-            self.words = set(f.read().upper().splitlines())
-
         # Determine variable set
         self.variables = set()
         for i in range(self.height):
@@ -104,30 +130,151 @@ class Crossword():
                             length=length
                         ))
 
+        # Save vocabulary list, one tuple of words for each length needed
+        lengths = set(var.length for var in self.variables)
+        self.vocabulary = load_vocabulary(words_file, lengths, cache)
+        for length in lengths:
+            self.vocabulary.setdefault(length, ())
+
+        # Number the variables in order of position
+        self.variable_list = sorted(
+            self.variables, key=lambda v: (v.i, v.j, v.direction)
+        )
+        self.ids = {var: index for index, var in enumerate(self.variable_list)}
+
+        # Find the variables crossing at each cell
+        cells = dict()
+        for var in self.variable_list:
+            for k, cell in enumerate(var.cells):
+                cells.setdefault(cell, []).append((self.ids[var], k))
+
         # Compute overlaps for each word
         # For any pair of variables v1, v2, their overlap is either:
         #    None, if the two variables do not overlap; or
         #    (i, j), where v1's ith character overlaps v2's jth character
-        self.overlaps = dict()
-        for v1 in self.variables:
-            for v2 in self.variables:
-                if v1 == v2:
-                    continue
-                cells1 = v1.cells
-                cells2 = v2.cells
-                intersection = set(cells1).intersection(cells2)
-                if not intersection:
-                    self.overlaps[v1, v2] = None
-                else:
-                    intersection = intersection.pop()
-                    self.overlaps[v1, v2] = (
-                        cells1.index(intersection),
-                        cells2.index(intersection)
-                    )
+        # Each variable also gets a list of its neighbors as tuples
+        # (neighbor id, i, j, k), where k is the position of the variable
+        # in the neighbor's own list.
+        self.overlaps = Overlaps()
+        self.adjacency = [[] for _ in self.variable_list]
+        for crossing in cells.values():
+            for (x, i), (y, j) in itertools.combinations(crossing, 2):
+                v1 = self.variable_list[x]
+                v2 = self.variable_list[y]
+                self.overlaps[v1, v2] = (i, j)
+                self.overlaps[v2, v1] = (j, i)
+                self.adjacency[x].append((y, i, j, len(self.adjacency[y])))
+                self.adjacency[y].append(
+                    (x, j, i, len(self.adjacency[x]) - 1)
+                )
 
     def neighbors(self, var):
         """Given a variable, return set of overlapping variables."""
         return set(
-            v for v in self.variables
-            if v != var and self.overlaps[v, var]
+            self.variable_list[y]
+            for y, _, _, _ in self.adjacency[self.ids[var]]
         )
+
+    @cached_property
+    def words(self):
+        """Set of all words of the lengths used in the crossword."""
+        return set(itertools.chain.from_iterable(self.vocabulary.values()))
+
+
+def load_vocabulary(words_file, lengths=None, cache=None):
+    """
+    Return a dictionary mapping each word length in `lengths` (or every
+    length, if None) to a sorted tuple of the distinct upper-cased words
+    of that length in `words_file`, which is read one line at a time.
+
+    If `cache` is a file path, the words of every length are kept there
+    along with the words file's modification time and size, and are
+    read from the cache for as long as the words file is unchanged.
+    """
+    if not cache:
+        return read_vocabulary(words_file, lengths)
+
+    stat = os.stat(words_file)
+    fingerprint = [stat.st_mtime_ns, stat.st_size]
+
+    # Each length is stored as one string, split only if it is needed
+    def split(buckets):
+        return {
+            int(length): tuple(text.split("\n"))
+            for length, text in buckets.items()
+            if lengths is None or int(length) in lengths
+        }
+
+    def parse(data):
+        if data["fingerprint"] != fingerprint:
+            return None
+        return split(data["buckets"])
+
+    vocabulary = read_cache(cache, CACHE_VERSION, parse)
+    if vocabulary is None:
+        buckets = {
+            length: "\n".join(words)
+            for length, words in read_vocabulary(words_file).items()
+        }
+        write_cache(cache, CACHE_VERSION, {
+            "fingerprint": fingerprint,
+            "buckets": buckets
+        })
+        vocabulary = split(buckets)
+    return vocabulary
+
+
+def read_vocabulary(words_file, lengths=None):
+    """
+    Read the words of `words_file` one line at a time into sorted tuples
+    of distinct upper-cased words by length, keeping only the lengths in
+    `lengths` unless it is None.
+    """
+    buckets = dict()
+    with open(words_file) as f:
+        for line in f:
+            word = line.rstrip("\r\n").upper()
+            if word and (lengths is None or len(word) in lengths):
+                buckets.setdefault(len(word), set()).add(word)
+    return {
+        length: tuple(sorted(words)) for length, words in buckets.items()
+    }
+
+
+def read_cache(path, version, parse):
+    """
+    Read a cache file written by `write_cache` with the same `version`
+    and return parse(data) for the JSON value `data` it holds.
+
+    Return None if the file is missing, was written with another
+    version, or is malformed in any way, including `parse` failing on
+    it, so that callers rebuild the cache.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            contents = json.load(f)
+        if contents["version"] != version:
+            return None
+        return parse(contents["data"])
+    except (AttributeError, LookupError, OSError, TypeError, ValueError):
+        return None
+
+
+def write_cache(path, version, data):
+    """
+    Write a JSON cache file at `path` holding `version` and `data`.
+    """
+    # Write to a temporary file of its own next to the cache and move it
+    # into place, so a crash never leaves half a cache and concurrent
+    # writers never write to the same file
+    descriptor, temporary = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)),
+        prefix=os.path.basename(path) + ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+            json.dump({"version": version, "data": data}, f)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
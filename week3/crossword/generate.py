@@ -1,20 +1,264 @@
+import argparse
+import heapq
+import itertools
+import multiprocessing
+import os
+import random
 import sys
+import time
+
+from bisect import bisect_left
+from collections import deque
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from crossword import *
 
+# Suffix of the default vocabulary cache next to a word list
+CACHE_SUFFIX = ".cache"
+
+# Inference used by successive solvers in a portfolio
+PORTFOLIO = ["mac", "mac", "forward"]
+
+# Nodes searched between checks of the time limit and cancellation
+CHECK_INTERVAL = 64
+
+# Set in portfolio workers once any of them has finished the search
+stop_event = None
+
+
+class SearchInterrupted(Exception):
+    """Raised inside the search when it runs out of time or is cancelled."""
+
+
+class Domains(MutableMapping):
+    """
+    Mapping from each variable to its domain, backed by the list `bits`
+    of domains indexed by variable id, which the solver reads directly.
+    """
+
+    def __init__(self, crossword, bits):
+        self.crossword = crossword
+        self.bits = bits
+
+    def __getitem__(self, var):
+        return self.bits[self.crossword.ids[var]]
+
+    def __setitem__(self, var, domain):
+        self.bits[self.crossword.ids[var]] = domain
+
+    def __delitem__(self, var):
+        raise TypeError("every variable has a domain")
+
+    def __iter__(self):
+        return iter(self.crossword.variable_list)
+
+    def __len__(self):
+        return len(self.bits)
+
 
 class CrosswordCreator():
 
-    def __init__(self, crossword):
+    def __init__(self, crossword, inference="mac", seed=None):
         """
         Create new CSP crossword generate.
+
+        After each assignment, `inference` prunes the domains of the
+        assigned variable's neighbors: "forward" revises each arc into
+        the variable once, "mac" maintains arc consistency across the
+        whole crossword, and None does no inference.
+
+        If `seed` is given, ties between equally good variables and
+        between equally good words are broken at random, so that
+        differently seeded solvers explore the search in different
+        orders.
+
+        Words are grouped by length and numbered within their group, and
+        each domain is a bitset of those numbers: bit k of
+        `self.domains[var]` is set if the kth word of length
+        `var.length` is still possible for `var`.
+
+        Internally variables are referred to by their ids in `crossword`,
+        and domains are read from the list `self.bits` by id.
         """
         self.crossword = crossword
-        self.domains = {
-            var: self.crossword.words.copy()
-            for var in self.crossword.variables
+        self.inference = inference
+        self.random = None if seed is None else random.Random(seed)
+        self.adjacency = crossword.adjacency
+        self.lengths = [var.length for var in crossword.variable_list]
+
+        # Words of each length, shared with the crossword, and for each
+        # length, position and letter, the bitset of words with that
+        # letter at that position
+        self.vocabulary = crossword.vocabulary
+        self.letters = {
+            length: letter_table(self.vocabulary[length], length)
+            for length in set(self.lengths)
         }
 
+        self.bits = [
+            (1 << len(self.vocabulary[length])) - 1 for length in self.lengths
+        ]
+        self.domains = Domains(crossword, self.bits)
+
+        # For each variable y and its kth neighbor x, how many words in
+        # the domain of y have each letter at the cell y shares with x
+        self.counts = [
+            [
+                {
+                    letter: (self.bits[y] & words).bit_count()
+                    for letter, words in self.letters[length][i].items()
+                }
+                for _, i, _, _ in self.adjacency[y]
+            ]
+            for y, length in enumerate(self.lengths)
+        ]
+
+        # Variables of each length, which may not share a word
+        self.by_length = dict()
+        for x, length in enumerate(self.lengths):
+            self.by_length.setdefault(length, []).append(x)
+
+        # Heap of (domain size, -degree, tiebreak, variable) entries for
+        # choosing variables, with a new entry pushed whenever a domain
+        # changes; entries whose size is out of date are skipped
+        self.degree = [len(neighbors) for neighbors in self.adjacency]
+        if self.random is None:
+            self.tiebreak = itertools.count()
+        else:
+            self.tiebreak = iter(self.random.random, None)
+        self.heap = []
+        for x in range(len(self.bits)):
+            self.push(x)
+
+        # Domains replaced during search, as (variable, old domain) pairs
+        # to restore on backtracking, and counts of the search's work
+        self.trail = []
+        self.stats = {"nodes": 0, "backtracks": 0, "prunes": 0}
+
+        # When to give up searching, an event that cancels the search
+        # when set, and how often to report progress
+        self.deadline = None
+        self.stop = None
+        self.progress = None
+        self.reported = None
+        self.status = None
+
+        # Words in the current assignment, which no other variable may use
+        self.used = set()
+
+    def words(self, var, domain=None):
+        """
+        Return the list of words in the domain of `var`, or in the bitset
+        `domain` of words of its length if given.
+        """
+        if domain is None:
+            domain = self.domains[var]
+        return members(domain, self.vocabulary[var.length])
+
+    def arc(self, x, y):
+        """
+        Return the arc from variable `x` to variable `y` as a pair of the
+        id of `x` and the position of `y` among its neighbors, or None if
+        they do not overlap.
+        """
+        x = self.crossword.ids[x]
+        y = self.crossword.ids[y]
+        for k, (neighbor, _, _, _) in enumerate(self.adjacency[x]):
+            if neighbor == y:
+                return x, k
+        return None
+
+    def set_domain(self, y, domain):
+        """
+        Replace the domain of the variable with id `y` by the bitset
+        `domain`, updating the letter counts of the arcs into `y` by the
+        words removed or added.
+
+        Return the arcs (x, k) into `y` where a letter lost its last
+        supporting word, and so whose x may need revising. Between
+        variables of the same length a letter with one word left counts
+        as lost, as that word cannot support itself.
+        """
+        old = self.bits[y]
+        if domain == old:
+            return []
+        removed = old & ~domain
+        added = domain & ~old
+        self.bits[y] = domain
+        length = self.lengths[y]
+        table = self.letters[length]
+
+        weakened = []
+        for (x, i, _, k), counts in zip(self.adjacency[y], self.counts[y]):
+            limit = 1 if self.lengths[x] == length else 0
+            lost = False
+            for letter, words in table[i].items():
+                if removed & words:
+                    before = counts[letter]
+                    counts[letter] -= (removed & words).bit_count()
+                    if before > limit >= counts[letter]:
+                        lost = True
+                if added & words:
+                    counts[letter] += (added & words).bit_count()
+            if lost:
+                weakened.append((x, k))
+
+        self.push(y)
+        return weakened
+
+    def push(self, x):
+        """
+        Add an entry for the variable with id `x` and its current domain
+        size to the heap used to choose variables.
+        """
+        heapq.heappush(self.heap, (
+            self.bits[x].bit_count(), -self.degree[x], next(self.tiebreak), x
+        ))
+
+    def prune(self, x, domain):
+        """
+        Narrow the domain of the variable with id `x` to `domain` as
+        `set_domain` does, recording the old domain on the trail so it
+        can be restored.
+        """
+        old = self.bits[x]
+        self.trail.append((x, old))
+        self.stats["prunes"] += (old & ~domain).bit_count()
+        return self.set_domain(x, domain)
+
+    def undo(self, mark):
+        """
+        Restore every domain changed since the trail had `mark` entries.
+        """
+        while len(self.trail) > mark:
+            x, domain = self.trail.pop()
+            self.set_domain(x, domain)
+
+    def supported(self, x, k):
+        """
+        Return the bitset of words in the domain of the variable with id
+        `x` that some word of its kth neighbor supports, read from the
+        letter counts of that neighbor.
+        """
+        y, i, j, back = self.adjacency[x][k]
+        x_letters = self.letters[self.lengths[x]][i]
+        same_length = self.lengths[x] == self.lengths[y]
+
+        supported = 0
+        for letter, count in self.counts[y][back].items():
+            if not count or letter not in x_letters:
+                continue
+            support = x_letters[letter]
+
+            # A single matching word only supports the other words of x
+            if same_length and count == 1:
+                support &= ~(
+                    self.bits[y] & self.letters[self.lengths[y]][j][letter]
+                )
+            supported |= support
+        return self.bits[x] & supported
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -85,27 +329,70 @@ class CrosswordCreator():
 
         img.save(filename)
 
-    def solve(self):
+    def solve(self, time_limit=None, stop=None, progress=None):
         """
         Enforce node and arc consistency, and then solve the CSP.
+
+        The search gives up after `time_limit` seconds, or once the
+        event `stop` is set, and then returns None as when there is no
+        solution; `self.status` tells the cases apart. If `progress` is
+        given, statistics are written to standard error every
+        `progress` seconds.
         """
+        start = time.monotonic()
+        self.stats = {"nodes": 0, "backtracks": 0, "prunes": 0}
+        self.deadline = None if time_limit is None else start + time_limit
+        self.stop = stop
+        self.progress = progress
+        self.reported = start
+
         self.enforce_node_consistency()
-        self.ac3()
-        return self.backtrack(dict())
+        if not self.ac3():
+            assignment = None
+        else:
+            self.trail = []
+            self.used = set()
+            try:
+                assignment = self.backtrack(dict())
+            except SearchInterrupted as interruption:
+                self.status = str(interruption)
+                self.stats["time"] = time.monotonic() - start
+                return None
+
+        self.status = "no solution" if assignment is None else "solved"
+        self.stats["time"] = time.monotonic() - start
+        return assignment
+
+    def check_interrupted(self):
+        """
+        Raise SearchInterrupted if the search is out of time or has been
+        cancelled, and report progress if it is due.
+        """
+        now = time.monotonic()
+        if self.deadline is not None and now > self.deadline:
+            raise SearchInterrupted("timed out")
+        if self.stop is not None and self.stop.is_set():
+            raise SearchInterrupted("cancelled")
+        if self.progress is not None and now - self.reported >= self.progress:
+            self.reported = now
+            stats = self.stats
+            print(f"{stats['nodes']} nodes, {stats['backtracks']} "
+                  f"backtracks, {stats['prunes']} words pruned",
+                  file=sys.stderr)
 
     def enforce_node_consistency(self):
         """
         Update `self.domains` such that each variable is node-consistent.
         (Remove any values that are inconsistent with a variable's unary
          constraints; in this case, the length of the word.)
-        """
-        for var in self.domains:
-            words = self.domains[var].copy()
-            for word in words:
-                if len(word) != var.length:
-                    self.domains[var].remove(word)
 
-       # raise NotImplementedError
+        Domains only ever hold words of their variable's length, so this
+        just clears any bits beyond the words of that length.
+        """
+        for x, length in enumerate(self.lengths):
+            self.set_domain(x, self.bits[x] & (
+                (1 << len(self.vocabulary[length])) - 1
+            ))
 
     def revise(self, x, y):
         """
@@ -115,28 +402,19 @@ class CrosswordCreator():
 
         Return True if a revision was made to the domain of `x`; return
         False if no revision was made.
+
+        A word of `x` is supported exactly when the count of words of `y`
+        with its letter at the overlap is positive, so no words of `y`
+        are looked at.
         """
-        if self.crossword.overlaps[x,y] == None:
+        arc = self.arc(x, y)
+        if arc is None:
             return False
-        revised = False
-        xwords = self.domains[x].copy()
-        for wx in xwords:
-                accepted = False
-                ywords = self.domains[y].copy()
-                for wy in ywords:
-                    if wx == wy:
-                        continue
-                    xletter = wx[self.crossword.overlaps[x, y][0]]
-                    yletter = wy[self.crossword.overlaps[x, y][1]]
-                    if xletter == yletter:
-                        accepted = True
-                if not accepted:
-                    self.domains[x].remove(wx)
-                    revised = True
-        return revised
-
-        
-        raise NotImplementedError
+        domain = self.supported(*arc)
+        if domain == self.bits[arc[0]]:
+            return False
+        self.set_domain(arc[0], domain)
+        return True
 
     def ac3(self, arcs=None):
         """
@@ -147,43 +425,51 @@ class CrosswordCreator():
         Return True if arc consistency is enforced and no domains are empty;
         return False if one or more domains end up empty.
         """
-        if arcs == None:
-            arcs = list()
-            for var in self.crossword.variables:
-                for neighbor in self.crossword.neighbors(var):
-                    arcs.append((var,neighbor))
-                    
-        queue = QueueFrontier()
-        for arc in arcs:
-            queue.add(arc)
-        
-        while queue.empty() == False:
-            x, y = queue.remove()
-            if self.revise(x,y):
-                if len(self.domains[x]) == 0:
-                    return False
-                for neighbor in self.crossword.neighbors(x):
-                    if neighbor == y:
-                        continue
-                    queue.add((x,neighbor))
-    
+        if arcs is None:
+            arcs = [
+                (x, k)
+                for x, neighbors in enumerate(self.adjacency)
+                for k in range(len(neighbors))
+            ]
+        else:
+            arcs = [self.arc(x, y) for x, y in arcs]
+        return self.propagate(arc for arc in arcs if arc is not None)
+
+    def propagate(self, arcs):
+        """
+        Revise `arcs`, given as pairs (x, k) of a variable id and the
+        position of a neighbor, until every domain is arc consistent.
+
+        As in AC-4, removing words only requeues the arcs whose letter
+        counts show that some letter lost all of its support.
+
+        Return False if some domain ends up empty, and True otherwise.
+        """
+        queue = deque(arcs)
+        queued = set(queue)
+        while queue:
+            arc = queue.popleft()
+            queued.discard(arc)
+            x, k = arc
+            domain = self.supported(x, k)
+            if domain == self.bits[x]:
+                continue
+            y = self.adjacency[x][k][0]
+            for weakened in self.prune(x, domain):
+                if weakened[0] != y and weakened not in queued:
+                    queue.append(weakened)
+                    queued.add(weakened)
+            if not domain:
+                return False
+
         return True
-                
-        raise NotImplementedError
 
     def assignment_complete(self, assignment):
         """
         Return True if `assignment` is complete (i.e., assigns a value to each
         crossword variable); return False otherwise.
         """
-        if len(assignment) != len(self.crossword.variables):
-            return False
-        for var in assignment.keys():
-            if assignment[var] == None:
-                return False
-        return True
-         
-        raise NotImplementedError
+        return len(assignment) == len(self.crossword.variables)
 
     def consistent(self, assignment):
         """
@@ -210,41 +496,50 @@ class CrosswordCreator():
             
         raise NotImplementedError
 
+    def consistent_word(self, var, word, assignment):
+        """
+        Return True if assigning `word` to `var` keeps a consistent
+        `assignment` consistent, checking only the length of `word`,
+        whether it is already used, and the letters it shares with
+        assigned neighbors; return False otherwise.
+
+        `self.used` must hold the words of `assignment`.
+        """
+        if len(word) != var.length or word in self.used:
+            return False
+        variables = self.crossword.variable_list
+        for y, i, j, _ in self.adjacency[self.crossword.ids[var]]:
+            neighbor = variables[y]
+            if neighbor in assignment and word[i] != assignment[neighbor][j]:
+                return False
+        return True
+
     def order_domain_values(self, var, assignment):
         """
         Return a list of values in the domain of `var`, in order by
         the number of values they rule out for neighboring variables.
         The first value in the list, for example, should be the one
         that rules out the fewest values among the neighbors of `var`.
+
+        A word leaves each unassigned neighbor with the words counted
+        for its letter at the overlap, so words are sorted by the total
+        of those counts, highest first, without looking at any words of
+        the neighbors.
         """
-        occ = {i : set() for i in range(0,3000)}
-        sorted = list()
-        
-        for word in self.domains[var]:
-            counter = 0
-            for y in assignment.keys():
-                if y == var:
-                    continue
-                elif assignment[y] != None:
-                    continue
-                if self.crossword.overlaps[var,y] is not None:
-                    i, j = self.crossword.overlaps[var,y]
-                else:
-                    continue
-                common_letter = word[i]
-                for w in self.domains[y]:
-                    if w[j] != common_letter:
-                        counter += 1
-                        
-            occ[counter].add(word)
-            
-        for n in range(0,3000):
-            for word in occ[n]:
-                sorted.append(word)
-                
-        return sorted
-         
-        raise NotImplementedError
+        variables = self.crossword.variable_list
+        overlaps = [
+            (i, self.counts[y][back])
+            for y, i, _, back in self.adjacency[self.crossword.ids[var]]
+            if variables[y] not in assignment
+        ]
+
+        def remaining(word):
+            return sum(counts.get(word[i], 0) for i, counts in overlaps)
+
+        words = self.words(var)
+        if self.random is not None:
+            self.random.shuffle(words)
+        return sorted(words, key=remaining, reverse=True)
 
     def select_unassigned_variable(self, assignment):
         """
@@ -253,29 +548,25 @@ class CrosswordCreator():
         in its domain. If there is a tie, choose the variable with the highest
         degree. If there is a tie, any of the tied variables are acceptable
         return values.
+
+        The best entry is read off the heap, after discarding entries of
+        assigned variables and entries older than their domain.
         """
-        temp = dict()
-        for var in self.crossword.variables:
-            if var not in assignment:
-                return var
-                
-            temp[var] = len(self.domains[var])
-            
-        min = 3000
-        min_var = None
-        for v in temp.keys():
-            if min_var is None:
-                min_var = v
-                min = temp[v]
+        variables = self.crossword.variable_list
+        heap = self.heap
+        if len(heap) > 4 * len(variables) + 64:
+            heap[:] = []
+            for x, var in enumerate(variables):
+                if var not in assignment:
+                    self.push(x)
+
+        while heap:
+            size, _, _, x = heap[0]
+            if variables[x] in assignment or size != self.bits[x].bit_count():
+                heapq.heappop(heap)
                 continue
-            if temp[v] <= min and len(self.crossword.neighbors(v)) > len(self.crossword.neighbors(min_var)):
-                min_var = v
-                min = temp[v]
-                
-        
-        return min_var
-                   
-        raise NotImplementedError
+            return variables[x]
+        return None
 
     def backtrack(self, assignment):
         """
@@ -289,17 +580,102 @@ class CrosswordCreator():
         if self.assignment_complete(assignment):
             return assignment
         var = self.select_unassigned_variable(assignment)
-        for dom in self.order_domain_values(var,assignment):
-            assignment[var] = dom
-            if self.consistent(assignment):
-                result = self.backtrack(assignment)
-                if result is not None:
-                    return result
-            assignment[var] = None
-        
+        for word in self.order_domain_values(var, assignment):
+            self.stats["nodes"] += 1
+            if self.stats["nodes"] % CHECK_INTERVAL == 0:
+                self.check_interrupted()
+            if self.consistent_word(var, word, assignment):
+                assignment[var] = word
+                self.used.add(word)
+                mark = len(self.trail)
+                if self.infer(var, word, assignment):
+                    result = self.backtrack(assignment)
+                    if result is not None:
+                        return result
+                self.undo(mark)
+                self.used.discard(word)
+                del assignment[var]
+            self.stats["backtracks"] += 1
+
         return None
-            
-        raise NotImplementedError
+
+    def infer(self, var, word, assignment):
+        """
+        Narrow the domain of `var` to `word`, remove `word` from the other
+        unassigned variables of its length, and prune the neighbors'
+        domains according to `self.inference`. Every change is recorded
+        on the trail.
+
+        Return False if some domain ends up empty, and True otherwise.
+        """
+        variables = self.crossword.variable_list
+        x = self.crossword.ids[var]
+        bit = 1 << bisect_left(self.vocabulary[var.length], word)
+        arcs = self.prune(x, bit)
+
+        for other in self.by_length[var.length]:
+            if other == x or variables[other] in assignment:
+                continue
+            if self.bits[other] & bit:
+                arcs.extend(self.prune(other, self.bits[other] & ~bit))
+                if not self.bits[other]:
+                    return False
+
+        if self.inference == "mac":
+            return self.propagate(arcs)
+        if self.inference == "forward":
+            for y, _, _, back in self.adjacency[x]:
+                if variables[y] in assignment:
+                    continue
+                domain = self.supported(y, back)
+                if domain != self.bits[y]:
+                    self.prune(y, domain)
+                    if not domain:
+                        return False
+        return True
+
+
+def letter_table(words, length):
+    """
+    Return a list with, for each position in words of `length` letters,
+    a dictionary mapping each letter to the bitset of `words` that have
+    that letter at that position.
+    """
+    table = []
+    for position in range(length):
+        indices = dict()
+        for k, word in enumerate(words):
+            indices.setdefault(word[position], []).append(k)
+        table.append({
+            letter: bitset(positions, len(words))
+            for letter, positions in indices.items()
+        })
+    return table
+
+
+def bitset(positions, size):
+    """
+    Return the int with the bits at `positions` set, built in one pass
+    over a byte array of `size` bits.
+    """
+    bits = bytearray((size + 7) // 8)
+    for k in positions:
+        bits[k >> 3] |= 1 << (k & 7)
+    return int.from_bytes(bits, "little")
+
+
+def members(domain, vocabulary):
+    """
+    Return the list of words of `vocabulary` whose bits are set in the
+    bitset `domain`.
+    """
+    words = []
+    while domain:
+        low = domain & -domain
+        words.append(vocabulary[low.bit_length() - 1])
+        domain ^= low
+    return words
+
 
 class StackFrontier():
     def __init__(self):
@@ -333,28 +709,145 @@ class QueueFrontier(StackFrontier):
             self.frontier = self.frontier[1:]
             return node
 def main():
-
-    # Check usage
-    if len(sys.argv) not in [3, 4]:
-        sys.exit("Usage: python generate.py structure words [output]")
-
-    # Parse command-line arguments
-    structure = sys.argv[1]
-    words = sys.argv[2]
-    output = sys.argv[3] if len(sys.argv) == 4 else None
+    parser = argparse.ArgumentParser(
+        description="Generate a crossword puzzle from a structure and words."
+    )
+    parser.add_argument("structure", help="file with the puzzle structure")
+    parser.add_argument("words", help="file with one word per line")
+    parser.add_argument("output", nargs="?",
+                        help="image file to save the puzzle to")
+    parser.add_argument("-p", "--portfolio", type=int, metavar="SOLVERS",
+                        help="race this many differently seeded solvers "
+                             "in parallel processes")
+    parser.add_argument("-t", "--time-limit", type=float, metavar="SECONDS",
+                        help="give up after this many seconds")
+    parser.add_argument("--inference", default="mac",
+                        choices=["mac", "forward", "none"],
+                        help="pruning after each assignment (default: mac)")
+    parser.add_argument("--seed", type=int,
+                        help="seed for breaking ties at random")
+    parser.add_argument("--progress", type=float, metavar="SECONDS",
+                        help="report search statistics this often")
+    parser.add_argument("--cache", nargs="?", const=True, metavar="FILE",
+                        help="cache the preprocessed word list, by default "
+                             f"next to it with the suffix {CACHE_SUFFIX}")
+    args = parser.parse_args()
+    cache = args.cache
+    if cache is True:
+        cache = args.words + CACHE_SUFFIX
 
     # Generate crossword
-    crossword = Crossword(structure, words)
-    creator = CrosswordCreator(crossword)
-    assignment = creator.solve()
+    crossword = Crossword(args.structure, args.words, cache)
+    if args.portfolio:
+        creator = CrosswordCreator(crossword)
+        assignment, results = solve_portfolio(
+            args.structure, args.words, args.portfolio, args.time_limit,
+            args.seed or 0, cache
+        )
+        if assignment is not None:
+            assignment = dict(zip(crossword.variable_list, assignment))
+        proven = any(result["status"] == "no solution" for result in results)
+        for result in results:
+            print(f"Solver {result['solver']} ({result['inference']}, "
+                  f"seed {result['seed']}): {result['status']} "
+                  f"in {result['time']:.2f}s, {result['nodes']} nodes, "
+                  f"{result['backtracks']} backtracks, "
+                  f"{result['prunes']} words pruned")
+    else:
+        inference = None if args.inference == "none" else args.inference
+        creator = CrosswordCreator(crossword, inference, args.seed)
+        assignment = creator.solve(args.time_limit, progress=args.progress)
+        proven = creator.status == "no solution"
+        stats = creator.stats
+        print(f"{creator.status.capitalize()} in {stats['time']:.2f}s, "
+              f"{stats['nodes']} nodes, {stats['backtracks']} backtracks, "
+              f"{stats['prunes']} words pruned")
 
     # Print result
     if assignment is None:
-        print("No solution.")
+        print("No solution." if proven else "Gave up before finding one.")
     else:
         creator.print(assignment)
-        if output:
-            creator.save(assignment, output)
+        if args.output:
+            creator.save(assignment, args.output)
+
+
+def solve_portfolio(structure, words, solvers=None, time_limit=None, seed=0,
+                    cache=None):
+    """
+    Solve the crossword given by the `structure` and `words` files with
+    `solvers` solvers racing on a process pool, each with its own seed
+    derived from `seed` and inference taken in turn from PORTFOLIO. The
+    first solver to finish the search cancels the others, and every
+    solver gives up after `time_limit` seconds. Solvers load the
+    vocabulary from `cache` if given.
+
+    Return the first complete assignment found, as a list of words
+    indexed by variable id, or None, along with a list of each solver's
+    configuration, outcome and statistics.
+    """
+    solvers = solvers or os.cpu_count() or 1
+    stop = multiprocessing.Event()
+
+    # Build the vocabulary cache once here, so solvers only read it
+    if cache:
+        load_vocabulary(words, (), cache)
+
+    tasks = [
+        (structure, words, cache, PORTFOLIO[k % len(PORTFOLIO)],
+         None if k == 0 else seed * 1000003 + k, time_limit)
+        for k in range(solvers)
+    ]
+
+    assignment = None
+    results = []
+    with ProcessPoolExecutor(max_workers=solvers, initializer=set_stop_event,
+                             initargs=(stop,)) as executor:
+        futures = {
+            executor.submit(solve_task, task): k
+            for k, task in enumerate(tasks)
+        }
+        for future in as_completed(futures):
+            words_by_id, result = future.result()
+            result["solver"] = futures[future]
+            results.append(result)
+            if result["status"] in ("solved", "no solution"):
+                stop.set()
+                if assignment is None:
+                    assignment = words_by_id
+
+    results.sort(key=lambda result: result["solver"])
+    return assignment, results
+
+
+def set_stop_event(event):
+    """
+    Share the portfolio's cancellation event with a worker process.
+    """
+    global stop_event
+    stop_event = event
+
+
+def solve_task(task):
+    """
+    Run one portfolio solver on a task (structure, words, cache,
+    inference, seed, time_limit). Return its assignment as a list of
+    words indexed by variable id, or None, along with its outcome and
+    statistics.
+    """
+    structure, words, cache, inference, seed, time_limit = task
+    crossword = Crossword(structure, words, cache)
+    creator = CrosswordCreator(crossword, inference, seed)
+    assignment = creator.solve(time_limit, stop_event)
+    if assignment is not None:
+        assignment = [assignment[var] for var in crossword.variable_list]
+    result = dict(creator.stats)
+    result.update({
+        "inference": inference,
+        "seed": seed,
+        "status": creator.status
+    })
+    return assignment, result
 
 
 if __name__ == "__main__":
@@ -0,0 +1,55 @@
+import os
+import random
+
+import pytest
+
+from crossword import Crossword
+from generate import CrosswordCreator
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# Random partial assignments grown on each puzzle
+TRIALS = 1000
+
+
+@pytest.mark.parametrize("structure, words", [
+    ("structure0.txt", "words0.txt"),
+    ("structure1.txt", "words1.txt"),
+    ("structure2.txt", "words2.txt"),
+    ("structure1.txt", "words0.txt")
+])
+def test_consistent_word_matches_consistent(structure, words):
+    """
+    Grow random partial assignments one word at a time and check that
+    consistent_word agrees with the full consistency check on every
+    word tried, until a word is rejected.
+    """
+    crossword = Crossword(
+        os.path.join(DATA, structure), os.path.join(DATA, words)
+    )
+    creator = CrosswordCreator(crossword)
+    rng = random.Random(0)
+    variables = crossword.variable_list
+    vocabulary = sorted(crossword.words)
+
+    for _ in range(TRIALS):
+        assignment = dict()
+        creator.used = set()
+        for var in rng.sample(variables, len(variables)):
+            # Mostly words that fit, sometimes any word at all
+            if rng.random() < 0.8 and creator.vocabulary[var.length]:
+                word = rng.choice(creator.vocabulary[var.length])
+            else:
+                word = rng.choice(vocabulary)
+
+            # consistent indexes into words before checking their length
+            expected = (
+                len(word) == var.length
+                and creator.consistent({**assignment, var: word})
+            )
+            assert creator.consistent_word(var, word, assignment) \
+                == expected, (var, word, assignment)
+            if not expected:
+                break
+            assignment[var] = word
+            creator.used.add(word)